@@ -0,0 +1,215 @@
+"""
+端到端基准测试
+在子进程中启动模拟服务器，用真实的登录和选课代码对其进行测量，报告：
+- 完整登录流程耗时
+- 每次选课请求的延迟
+- 每选上一门课程所需的请求数
+- 每门关注课程占用的CPU时间和内存（常驻内存增量）
+
+    python -m benchmarks.e2e --courses 1 4 16 --latency 0.02 --seat-release-interval 0.2
+"""
+import argparse
+import json
+import os
+import queue
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import List
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(args: argparse.Namespace, course_count: int = 20) -> subprocess.Popen:
+    # 每门课程只有一个教学班，且只释放主修课程的空位，使释放的空位都落在被关注的教学班上
+    command = [
+        sys.executable, "-m", "benchmarks.mock_server", "--port", str(args.port),
+        "--courses", str(course_count), "--classes", "1", "--release-type", "TJKC",
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--failure-rate", str(args.failure_rate),
+        "--seat-release-interval", str(args.seat_release_interval),
+        "--session-ttl", str(args.session_ttl)
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline().strip()
+    if not line.startswith("READY "):
+        process.kill()
+        raise RuntimeError(f"模拟服务器启动失败：{line}")
+    # 客户端模块在导入时读取服务地址，因此必须在导入前设置，且各场景使用同一端口
+    os.environ["XJTU_ORG_URL"] = os.environ["XJTU_XKFW_URL"] = line.split(" ", 1)[1]
+    return process
+
+
+def mock_stats() -> dict:
+    with urllib.request.urlopen(f"{os.environ['XJTU_XKFW_URL']}/__mock__/stats") as response:
+        return json.load(response)
+
+
+def rss_kib() -> float:
+    """当前进程的常驻内存（KiB），仅支持Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError):
+        return 0.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def bench_login(runs: int) -> dict:
+    from login import Login
+
+    durations = []
+    for i in range(runs):
+        client = Login()
+        started_at = time.perf_counter()
+        success, message = client.login_process(f"22000000{i:02d}", "password")
+        durations.append(time.perf_counter() - started_at)
+        if not success:
+            raise RuntimeError(f"登录失败：{message}")
+    return {
+        "runs": runs,
+        "mean_ms": statistics.mean(durations) * 1000,
+        "p50_ms": percentile(durations, 0.5) * 1000,
+        "p95_ms": percentile(durations, 0.95) * 1000
+    }
+
+
+def bench_selection(course_count: int, wait_for_seat: bool, rps: float, timeout: float) -> dict:
+    from course_selection import CourseSelection
+    from engine import SelectionEngine
+    from log_sink import LogSink
+    from login import Login
+    from scheduler import RequestScheduler
+    from session_manager import SessionManager
+
+    student_code = "2200009999"
+    client = Login()
+    client.login_process(student_code, "password")
+    course_client = CourseSelection(client.session, client.token, client.ticket, student_code)
+
+    # 记录每次选课请求的耗时；选课引擎通过 select_target 提交预先构造好的请求
+    latencies = []
+    select_target = course_client.select_target
+
+    def timed_select_target(*args):
+        started_at = time.perf_counter()
+        try:
+            return select_target(*args)
+        finally:
+            latencies.append(time.perf_counter() - started_at)
+    course_client.select_target = timed_select_target
+
+    codes = [f"COMP{300000 + i}01" for i in range(course_count)]
+    sessions = SessionManager(student_code, "password", course_client, check_interval=3600)
+    sink = LogSink(path=None)
+    engine = SelectionEngine(sessions, scheduler=RequestScheduler(rps=rps, burst=rps), sink=sink)
+
+    requests_before = sum(mock_stats()["counts"].values())
+    rss_before = rss_kib()
+    cpu_before = time.process_time()
+    started_at = time.perf_counter()
+
+    engine.start()
+    for index, code in enumerate(codes):
+        engine.watch(index, code, "major", wait_for_seat=wait_for_seat)
+
+    selected = set()
+    pending = set(range(course_count))
+    while pending and time.perf_counter() - started_at < timeout:
+        try:
+            kind, data = engine.events.get(timeout=0.1)
+            if kind == "selected":
+                selected.add(data)
+            elif kind == "finished":
+                pending.discard(data)
+        except queue.Empty:
+            pass
+        sink.drain()
+
+    elapsed = time.perf_counter() - started_at
+    cpu = time.process_time() - cpu_before
+    rss_after = rss_kib()
+    engine.stop()
+    time.sleep(0.2)
+
+    # 减去统计接口本身的一次请求
+    requests = sum(mock_stats()["counts"].values()) - requests_before - 1
+    return {
+        "courses": course_count,
+        "mode": "watch" if wait_for_seat else "submit",
+        "selected": len(selected),
+        "elapsed_s": elapsed,
+        "attempts": len(latencies),
+        "attempt_p50_ms": percentile(latencies, 0.5) * 1000,
+        "attempt_p95_ms": percentile(latencies, 0.95) * 1000,
+        "requests_per_success": requests / len(selected) if selected else float("inf"),
+        "cpu_ms_per_course_s": cpu * 1000 / course_count / elapsed,
+        "rss_kib_per_course": (rss_after - rss_before) / course_count
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="基于模拟服务器的端到端基准测试")
+    parser.add_argument("--courses", type=int, nargs="+", default=[1, 4, 16], help="关注的课程数")
+    parser.add_argument("--modes", nargs="+", choices=["submit", "watch"], default=["submit", "watch"])
+    parser.add_argument("--login-runs", type=int, default=5)
+    parser.add_argument("--rps", type=float, default=20.0, help="调度器的每秒请求数上限")
+    parser.add_argument("--timeout", type=float, default=30.0, help="每个场景的最长运行时间（秒）")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seat-release-interval", type=float, default=0.2)
+    parser.add_argument("--session-ttl", type=float, default=0)
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+    args.port = free_port()
+
+    results = {"login": None, "selection": []}
+    server = start_mock_server(args)
+    try:
+        results["login"] = bench_login(args.login_runs)
+    finally:
+        server.kill()
+
+    for mode in args.modes:
+        for course_count in args.courses:
+            # 每个场景使用全新的服务器状态
+            server = start_mock_server(args, course_count)
+            try:
+                results["selection"].append(
+                    bench_selection(course_count, mode == "watch", args.rps, args.timeout)
+                )
+            finally:
+                server.kill()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    login = results["login"]
+    print(f"登录：{login['runs']}次，平均 {login['mean_ms']:.1f} ms，"
+          f"p50 {login['p50_ms']:.1f} ms，p95 {login['p95_ms']:.1f} ms")
+    print(f"{'模式':<8}{'课程数':>6}{'选上':>6}{'耗时s':>8}{'请求数':>8}{'p50ms':>8}{'p95ms':>8}"
+          f"{'请求/成功':>10}{'CPU ms/课/s':>12}{'内存KiB/课':>12}")
+    for row in results["selection"]:
+        print(f"{row['mode']:<8}{row['courses']:>6}{row['selected']:>6}{row['elapsed_s']:>8.2f}"
+              f"{row['attempts']:>8}{row['attempt_p50_ms']:>8.1f}{row['attempt_p95_ms']:>8.1f}"
+              f"{row['requests_per_success']:>10.1f}{row['cpu_ms_per_course_s']:>12.2f}"
+              f"{row['rss_kib_per_course']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
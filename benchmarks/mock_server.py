@@ -0,0 +1,496 @@
+"""
+本地模拟的统一身份认证和选课系统
+实现本工具用到的全部接口，可配置延迟、失败率、会话有效期和空位释放，
+用于在不访问真实系统的情况下运行和测量本工具
+
+    python -m benchmarks.mock_server --port 8000 --latency 0.05 --failure-rate 0.01
+
+客户端通过环境变量 XJTU_ORG_URL、XJTU_XKFW_URL 指向 http://127.0.0.1:8000 即可
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from timetable import Timetable, parse_schedule
+
+XKFW_PREFIX = "/xsxkapp/sys/xsxkapp"
+
+# 与真实系统一样，批次时间使用北京时间
+SERVER_TZ = datetime.timezone(datetime.timedelta(hours=8))
+
+TYPE_CODES = {
+    "TJKC": "COMP",
+    "XGXK": "CORE",
+    "TYKC": "PHED",
+    "FANKC": "AUTO"
+}
+
+
+class MockState:
+    """模拟服务器的全部状态：课程、教学班、会话和请求计数"""
+    def __init__(
+        self,
+        courses_per_type: int = 20,
+        classes_per_course: int = 3,
+        capacity: int = 30,
+        full_ratio: float = 1.0,
+        session_ttl: float = 0,
+        seat_release_interval: float = 0,
+        open_in: float = 0,
+        release_type: str = "",
+        clock_skew: float = 0,
+        check_conflicts: bool = False,
+        seed: int = 0
+    ):
+        """
+        Args:
+            courses_per_type: 每类课程的课程数
+            classes_per_course: 每门课程的教学班数
+            capacity: 每个教学班的容量
+            full_ratio: 初始时已满的教学班比例
+            session_ttl: 会话有效期（秒），0表示不过期
+            seat_release_interval: 每隔多少秒随机释放一个已满教学班的空位，0表示不释放
+            open_in: 选课批次在多少秒后开始，0表示已经开始
+            release_type: 只释放该类课程（如TJKC）的空位，为空时不限
+            clock_skew: 服务器时钟比本机快多少秒，影响 Date 头和选课开始的判断
+            check_conflicts: 是否拒绝与已选课程上课时间冲突的选课请求
+            seed: 随机数种子
+        """
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.session_ttl = session_ttl
+        self.seat_release_interval = seat_release_interval
+        self.release_type = release_type
+        self.term_prefix = "202520261"
+        self.batch_code = "MOCKBATCH01"
+        self.clock_skew = clock_skew
+        self.check_conflicts = check_conflicts
+        self.begin_time = self.now() + datetime.timedelta(seconds=open_in)
+        if open_in > 0:
+            # 批次时间只精确到秒，开始时刻取整秒
+            self.begin_time = self.begin_time.replace(microsecond=0) + datetime.timedelta(seconds=1)
+        self.end_time = self.begin_time + datetime.timedelta(days=1)
+
+        self.courses: Dict[str, list] = {type_code: [] for type_code in TYPE_CODES}
+        self.class_courses: Dict[str, dict] = {}   # 教学班ID -> 所属课程
+        self.classes: Dict[str, dict] = {}
+        for type_code, letters in TYPE_CODES.items():
+            for i in range(courses_per_type):
+                course_number = f"{letters}{300000 + i}"
+                course = {"courseNumber": course_number, "courseName": f"模拟课程{letters}{i}", "credit": "2", "tcList": []}
+                for j in range(classes_per_course):
+                    teaching_class_id = f"{self.term_prefix}{course_number}{j + 1:02d}"
+                    full = self.random.random() < full_ratio
+                    self.classes[teaching_class_id] = {
+                        "typeCode": type_code,
+                        "teachingClassID": teaching_class_id,
+                        "teacherName": f"教师{j + 1}",
+                        "classCapacity": capacity,
+                        "numberOfSelected": capacity if full else self.random.randrange(capacity),
+                        "teachingPlace": f"1-16周 星期{'一二三四五'[(i + j) % 5]} 第{(j % 4) * 2 + 1}-{(j % 4) * 2 + 2}节 主楼A-{100 + j}"
+                    }
+                    course["tcList"].append(teaching_class_id)
+                    self.class_courses[teaching_class_id] = course
+                self.courses[type_code].append(course)
+
+        self.tickets: Dict[str, str] = {}          # ticket -> 学号
+        self.cookie_sessions: Dict[str, str] = {}  # JSESSIONID -> 学号
+        self.tokens: Dict[str, tuple] = {}         # token -> (学号, 过期时间)
+        self.selected: Dict[str, set] = {}         # 学号 -> 已选教学班ID
+        self.counts: Counter = Counter()
+        self.successes = 0
+        # 选课开始后第一个选课请求到达的时刻，以及开始前到达的选课请求数
+        self.first_submit: Optional[datetime.datetime] = None
+        self.early_submits = 0
+
+    def now(self) -> datetime.datetime:
+        return datetime.datetime.now(SERVER_TZ) + datetime.timedelta(seconds=self.clock_skew)
+
+    def new_token(self, student_code: str) -> str:
+        token = uuid.uuid4().hex
+        expires = time.monotonic() + self.session_ttl if self.session_ttl else float("inf")
+        self.tokens[token] = (student_code, expires)
+        return token
+
+    def student_for_token(self, token: Optional[str]) -> Optional[str]:
+        entry = self.tokens.get(token or "")
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def release_seats(self, stopped: threading.Event) -> None:
+        """定时随机释放一个已满教学班的空位，模拟有人退课"""
+        while not stopped.wait(self.seat_release_interval):
+            with self.lock:
+                full = [
+                    tc for tc in self.classes.values()
+                    if tc["numberOfSelected"] >= tc["classCapacity"]
+                    and (not self.release_type or tc["typeCode"] == self.release_type)
+                ]
+                if full:
+                    self.random.choice(full)["numberOfSelected"] -= 1
+
+    def class_view(self, teaching_class_id: str) -> dict:
+        tc = dict(self.classes[teaching_class_id])
+        del tc["typeCode"]
+        tc["isFull"] = "1" if tc["numberOfSelected"] >= tc["classCapacity"] else "0"
+        tc["classCapacity"] = str(tc["classCapacity"])
+        tc["numberOfSelected"] = str(tc["numberOfSelected"])
+        return tc
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体一次写出，避免Nagle算法与延迟确认叠加带来的额外延迟
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    server: "MockServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def date_time_string(self, timestamp=None):
+        return super().date_time_string(time.time() + self.server.state.clock_skew)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        self.query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+
+        options = self.server.options
+        if options["latency"] or options["jitter"]:
+            time.sleep(options["latency"] + random.uniform(0, options["jitter"]))
+
+        state = self.server.state
+        endpoint = self._endpoint(url.path)
+        with state.lock:
+            state.counts[endpoint] += 1
+
+        if endpoint != "stats" and random.random() < options["failure_rate"]:
+            self._send(503, b"Service Unavailable", "text/plain")
+            return
+
+        handler = getattr(self, f"_{endpoint}", None)
+        if handler is None:
+            self._send(404, b"Not Found", "text/plain")
+            return
+        handler()
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        routes = {
+            "/openplatform/g/admin/login": "login",
+            "/openplatform/oauth/auth/getRedirectUrl": "redirect_url",
+            "/openplatform/oauth/authorize": "authorize",
+            f"{XKFW_PREFIX}/*default/index.do": "index",
+            f"{XKFW_PREFIX}/student/register.do": "register",
+            f"{XKFW_PREFIX}/elective/recommendedCourse.do": "recommended",
+            f"{XKFW_PREFIX}/elective/volunteer.do": "volunteer",
+            f"{XKFW_PREFIX}/elective/deleteVolunteer.do": "delete_volunteer",
+            f"{XKFW_PREFIX}/elective/courseResult.do": "course_result",
+            f"{XKFW_PREFIX}/publicinfo/onlineUsers.do": "online_users",
+            "/__mock__/stats": "stats"
+        }
+        if path in routes:
+            return routes[path]
+        if path.startswith(f"{XKFW_PREFIX}/student/") and path.endswith(".do"):
+            return "student_info"
+        return "unknown"
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json;charset=UTF-8",
+              headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data: dict, headers: Optional[dict] = None) -> None:
+        self._send(200, json.dumps(data, ensure_ascii=False).encode("utf-8"), headers=headers)
+
+    def _form(self) -> dict:
+        return {key: values[0] for key, values in parse_qs(self.body.decode("utf-8")).items()}
+
+    def _cookies(self) -> dict:
+        cookies = {}
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            if "=" in part:
+                key, value = part.strip().split("=", 1)
+                cookies[key] = value
+        return cookies
+
+    def _expired(self) -> None:
+        self._json({"code": "0", "msg": "登录失效，请重新登录"})
+
+    def _login(self):
+        data = json.loads(self.body or b"{}")
+        token_key = uuid.uuid4().hex
+        self._json(
+            {"code": 0, "message": "成功", "data": {"tokenKey": token_key, "username": data.get("username")}},
+            headers={"Set-Cookie": f"open_Platform_User={token_key}; Path=/"}
+        )
+
+    def _redirect_url(self):
+        student_code = self.query.get("personNo", "")
+        host = self.headers.get("Host")
+        self._json({"code": 0, "data": f"http://{host}/openplatform/oauth/authorize?personNo={student_code}"})
+
+    def _authorize(self):
+        state = self.server.state
+        ticket = uuid.uuid4().hex
+        with state.lock:
+            state.tickets[ticket] = self.query.get("personNo", "")
+        host = self.headers.get("Host")
+        self.send_response(302)
+        self.send_header("Location", f"http://{host}{XKFW_PREFIX}/*default/index.do?ticket={ticket}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _index(self):
+        state = self.server.state
+        session_id = uuid.uuid4().hex
+        with state.lock:
+            state.cookie_sessions[session_id] = state.tickets.pop(self.query.get("ticket", ""), "")
+        self._send(200, b"<html></html>", "text/html", headers={"Set-Cookie": f"JSESSIONID={session_id}; Path=/"})
+
+    def _register(self):
+        state = self.server.state
+        with state.lock:
+            student_code = state.cookie_sessions.get(self._cookies().get("JSESSIONID", ""))
+            if not student_code or student_code != self.query.get("number"):
+                self._json({"code": "0", "msg": "登录失效，请重新登录"})
+                return
+            token = state.new_token(student_code)
+        self._json({"code": "1", "data": {"name": f"学生{student_code}", "token": token, "number": student_code}})
+
+    def _student_info(self):
+        state = self.server.state
+        with state.lock:
+            student_code = state.student_for_token(self.headers.get("token"))
+        if student_code is None:
+            self._expired()
+            return
+        self._json({"code": "1", "msg": "", "data": {
+            "name": f"学生{student_code}",
+            "code": student_code,
+            "collegeName": "模拟学院",
+            "departmentName": "模拟系",
+            "schoolClassName": "模拟班级",
+            "grade": "2023",
+            "campusName": "兴庆校区",
+            "electiveBatchList": [{
+                "code": state.batch_code,
+                "name": "2025-2026学年第一学期本科生选课",
+                "schoolTerm": "2025-2026-1",
+                "schoolTermName": "2025-2026学年第一学期",
+                "beginTime": state.begin_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "endTime": state.end_time.strftime("%Y-%m-%d %H:%M:%S"),
+                "canSelect": "1",
+                "displayTJKC": "1",
+                "displayFANKC": "1",
+                "displayTYKC": "1",
+                "displayXGXK": "1"
+            }]
+        }})
+
+    def _recommended(self):
+        state = self.server.state
+        setting = json.loads(self._form().get("querySetting", "{}"))
+        data = setting.get("data", {})
+        with state.lock:
+            if state.student_for_token(self.headers.get("token")) is None:
+                self._expired()
+                return
+            query = data.get("queryContent", "")
+            courses = [
+                course for course in state.courses.get(data.get("teachingClassType"), [])
+                if query in course["courseNumber"] or query in course["courseName"]
+            ]
+            page_size = int(setting.get("pageSize") or 10)
+            page_number = int(setting.get("pageNumber") or 0)
+            page = courses[page_number * page_size:(page_number + 1) * page_size]
+            data_list = [
+                dict(course, tcList=[state.class_view(tc) for tc in course["tcList"]])
+                for course in page
+            ]
+        self._json({"code": "1", "msg": "", "totalCount": len(courses), "dataList": data_list})
+
+    def _course_result(self):
+        state = self.server.state
+        with state.lock:
+            student_code = state.student_for_token(self.headers.get("token"))
+            if student_code is None:
+                self._expired()
+                return
+            data_list = []
+            for teaching_class_id in sorted(state.selected.get(student_code, ())):
+                course = state.class_courses[teaching_class_id]
+                teaching_class = state.classes[teaching_class_id]
+                data_list.append({
+                    "teachingClassID": teaching_class_id,
+                    "courseNumber": course["courseNumber"],
+                    "courseName": course["courseName"],
+                    "teacherName": teaching_class["teacherName"],
+                    "teachingClassType": teaching_class["typeCode"],
+                    "teachingPlace": teaching_class["teachingPlace"]
+                })
+        self._json({"code": "1", "msg": "", "totalCount": len(data_list), "dataList": data_list})
+
+    def _volunteer(self):
+        state = self.server.state
+        data = json.loads(self._form().get("addParam", "{}")).get("data", {})
+        with state.lock:
+            student_code = state.student_for_token(self.headers.get("token"))
+            if student_code is None:
+                self._expired()
+                return
+            now = state.now()
+            if now < state.begin_time:
+                state.early_submits += 1
+                self._json({"code": "0", "msg": "当前不在选课时间范围内"})
+                return
+            if state.first_submit is None:
+                state.first_submit = now
+            teaching_class = state.classes.get(data.get("teachingClassId"))
+            selected = state.selected.setdefault(student_code, set())
+            if teaching_class is None:
+                self._json({"code": "0", "msg": "教学班不存在"})
+            elif teaching_class["teachingClassID"] in selected:
+                self._json({"code": "0", "msg": "该课程已选，不能重复选择"})
+            elif state.check_conflicts and self._conflicts(teaching_class, selected):
+                self._json({"code": "0", "msg": "与已选课程时间冲突"})
+            elif teaching_class["numberOfSelected"] >= teaching_class["classCapacity"]:
+                self._json({"code": "0", "msg": "该教学班已满"})
+            else:
+                teaching_class["numberOfSelected"] += 1
+                selected.add(teaching_class["teachingClassID"])
+                state.successes += 1
+                self._json({"code": "1", "msg": "选课成功"})
+
+    def _delete_volunteer(self):
+        state = self.server.state
+        data = json.loads(self.query.get("deleteParam", "{}")).get("data", {})
+        with state.lock:
+            student_code = state.student_for_token(self.headers.get("token"))
+            if student_code is None:
+                self._expired()
+                return
+            if state.now() < state.begin_time:
+                self._json({"code": "0", "msg": "当前不在选课时间范围内"})
+                return
+            teaching_class_id = data.get("teachingClassId")
+            selected = state.selected.setdefault(student_code, set())
+            if data.get("operationType") != "2" or teaching_class_id not in selected:
+                self._json({"code": "0", "msg": "已选课程中不存在该教学班"})
+                return
+            selected.discard(teaching_class_id)
+            state.classes[teaching_class_id]["numberOfSelected"] -= 1
+            self._json({"code": "1", "msg": "退课成功"})
+
+    def _conflicts(self, teaching_class: dict, selected: set) -> bool:
+        timetable = Timetable()
+        for teaching_class_id in selected:
+            timetable.add(teaching_class_id, parse_schedule(self.server.state.classes[teaching_class_id]["teachingPlace"]))
+        return bool(timetable.conflicts(parse_schedule(teaching_class["teachingPlace"])))
+
+    def _online_users(self):
+        self._json({"code": "1", "data": {"onlineUsers": random.randint(1000, 5000)}})
+
+    def _stats(self):
+        state = self.server.state
+        with state.lock:
+            first_submit_delay = (
+                (state.first_submit - state.begin_time).total_seconds()
+                if state.first_submit is not None else None
+            )
+            self._json({
+                "counts": dict(state.counts),
+                "successes": state.successes,
+                "early_submits": state.early_submits,
+                "first_submit_delay": first_submit_delay
+            })
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, state: MockState, latency: float = 0, jitter: float = 0, failure_rate: float = 0):
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.state = state
+        self.options = {"latency": latency, "jitter": jitter, "failure_rate": failure_rate}
+        self._stopped = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> None:
+        """在后台线程中运行"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        if self.state.seat_release_interval:
+            threading.Thread(target=self.state.release_seats, args=(self._stopped,), daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地模拟的选课系统")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口，0表示随机端口")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="每个请求额外的随机延迟上限（秒）")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="返回503的概率")
+    parser.add_argument("--session-ttl", type=float, default=0, help="会话有效期（秒），0表示不过期")
+    parser.add_argument("--seat-release-interval", type=float, default=0, help="释放空位的间隔（秒），0表示不释放")
+    parser.add_argument("--release-type", default="", help="只释放该类课程（如TJKC）的空位")
+    parser.add_argument("--open-in", type=float, default=0, help="选课批次在多少秒后开始")
+    parser.add_argument("--clock-skew", type=float, default=0, help="服务器时钟比本机快多少秒")
+    parser.add_argument("--courses", type=int, default=20, help="每类课程的课程数")
+    parser.add_argument("--classes", type=int, default=3, help="每门课程的教学班数")
+    parser.add_argument("--capacity", type=int, default=30, help="教学班容量")
+    parser.add_argument("--full-ratio", type=float, default=1.0, help="初始时已满的教学班比例")
+    parser.add_argument("--check-conflicts", action="store_true", help="拒绝与已选课程上课时间冲突的选课请求")
+    args = parser.parse_args()
+
+    state = MockState(
+        courses_per_type=args.courses,
+        classes_per_course=args.classes,
+        capacity=args.capacity,
+        full_ratio=args.full_ratio,
+        session_ttl=args.session_ttl,
+        seat_release_interval=args.seat_release_interval,
+        open_in=args.open_in,
+        release_type=args.release_type,
+        clock_skew=args.clock_skew,
+        check_conflicts=args.check_conflicts
+    )
+    server = MockServer(args.port, state, args.latency, args.jitter, args.failure_rate)
+    server.start()
+    print(f"READY {server.url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
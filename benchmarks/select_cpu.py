@@ -0,0 +1,102 @@
+"""
+选课请求的客户端CPU开销微基准
+用返回固定响应的传输层代替网络，只测量客户端构造请求、发送和解析结果所花的CPU时间，
+对比每次重新构造请求的 select_course 与预先构造请求的 select_target
+
+    python -m benchmarks.select_cpu --iterations 20000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from urllib.parse import urlsplit
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from cache import BootstrapCache
+from course_selection import CourseSelection, SelectionTarget
+from http_client import HttpClient, XKFW_URL
+
+STUDENT_CODE = "2200000001"
+BATCH_CODE = "MOCKBATCH01"
+
+
+class CannedAdapter(HTTPAdapter):
+    """不发出网络请求，直接返回固定响应的传输层"""
+    def __init__(self, body: bytes):
+        super().__init__()
+        self.body = body
+
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json;charset=UTF-8"})
+        response._content = self.body
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def make_client(cache_path: str) -> CourseSelection:
+    # 批次和前缀都从缓存读取，创建客户端时不访问网络
+    cache = BootstrapCache(path=cache_path)
+    cache.set_batch(STUDENT_CODE, BATCH_CODE, {"batch_code": BATCH_CODE, "end_time": "2099-01-01 00:00:00"})
+    cache.set_prefix(STUDENT_CODE, BATCH_CODE, "major", "202520261")
+
+    body = json.dumps({"code": "0", "msg": "该教学班已满", "data": None}, ensure_ascii=False).encode("utf-8")
+    session = HttpClient(adapter=CannedAdapter(body))
+    session.set_cookie("JSESSIONID", "0" * 32, urlsplit(XKFW_URL).hostname)
+    return CourseSelection(session, "0" * 32, "ticket", STUDENT_CODE, cache=cache)
+
+
+def measure(func, iterations: int) -> float:
+    """每次调用的平均CPU时间（微秒）"""
+    for _ in range(min(1000, iterations)):
+        func()
+    started_at = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started_at) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="选课请求的客户端CPU开销微基准")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = make_client(os.path.join(directory, "cache.json"))
+        target = SelectionTarget("COMP30000101", "major")
+
+        # 两条路径发出的请求必须完全一致
+        client.prepare_target(target)
+        headers, data = client._selection_form(target.class_code, target.course_type)
+        slow = client.session.session.prepare_request(
+            requests.Request("POST", target.request.url, headers=headers, data=data)
+        )
+        assert slow.body == target.request.body and slow.headers == target.request.headers
+
+        before = measure(lambda: client.select_course(target.class_code, target.course_type), args.iterations)
+        after = measure(lambda: client.select_target(target), args.iterations)
+
+    results = {
+        "iterations": args.iterations,
+        "select_course_us": before,
+        "select_target_us": after,
+        "speedup": before / after if after else float("inf")
+    }
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    print(f"每次选课请求的客户端CPU时间（{args.iterations}次平均）")
+    print(f"  select_course（每次重新构造）：{before:8.1f} us")
+    print(f"  select_target（预先构造）：    {after:8.1f} us")
+    print(f"  加速比：{results['speedup']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+启动耗时基准测试
+每次都在全新的子进程中测量，报告：
+- 导入 gui 和 cli 的耗时（-X importtime 统计的累计时间），以及其中最耗时的直接依赖
+- 导入 gui 后是否已经加载了登录窗口用不到的重量级模块（requests、asyncio、加密库等）
+- 从启动进程到登录窗口完成首次绘制的时间，以及后台预加载登录和选课模块完成的时间
+
+超出预算或提前加载了重量级模块时以状态码1退出，可用于在修改导入关系后检查启动是否变慢。
+没有图形界面（如未设置 DISPLAY 的Linux）时跳过登录窗口的测量
+
+    python -m benchmarks.startup --repeat 5 --import-budget-ms 250 --window-budget-ms 1000
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ("gui", "cli")
+
+# 导入这些模块时不应加载的模块：登录窗口出现前用不到，由 gui 在窗口显示后于后台线程中预加载
+DEFERRED_MODULES = {
+    "gui": ("requests", "urllib3", "Crypto", "asyncio", "yaml", "engine", "selection_ui")
+}
+
+# 在临时目录中打开登录窗口，窗口完成首次绘制后输出 window，后台预加载结束后输出 preloaded 并退出
+WINDOW_PROBE = """
+import threading
+import gui
+
+app = gui.LoginUI()
+
+def ready():
+    print("window", flush=True)
+    for thread in threading.enumerate():
+        if thread.name == "preload":
+            thread.join()
+    print("preloaded", flush=True)
+    app.root.destroy()
+
+app.root.after_idle(ready)
+app.run()
+"""
+
+
+def child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    return env
+
+
+def parse_importtime(stderr: str, module: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        (module 的累计导入时间（毫秒）, module 各直接依赖的累计导入时间（毫秒）)
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            cumulative_us = int(cumulative)
+        except ValueError:
+            continue  # 表头
+        stripped = name.lstrip()
+        entries.append(((len(name) - len(stripped) - 1) // 2, stripped.rstrip(), cumulative_us / 1000))
+
+    # 子模块先于导入它的模块输出，module 所在行之前、上一个顶层模块之后的第1层即为其直接依赖
+    for index in range(len(entries) - 1, -1, -1):
+        level, name, cumulative_ms = entries[index]
+        if level == 0 and name == module:
+            children = []
+            for child_level, child_name, child_ms in reversed(entries[:index]):
+                if child_level == 0:
+                    break
+                if child_level == 1:
+                    children.append((child_name, child_ms))
+            return cumulative_ms, sorted(children, key=lambda item: -item[1])
+    return 0.0, []
+
+
+def run_python(code: str) -> Tuple[float, subprocess.CompletedProcess]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True
+    )
+    return (time.perf_counter() - started) * 1000, result
+
+
+def bench_interpreter(repeat: int) -> float:
+    """空解释器启动的耗时（毫秒），作为其余测量的基准"""
+    return statistics.median(run_python("pass")[0] for _ in range(repeat))
+
+
+def bench_import(module: str, repeat: int, top: int) -> dict:
+    # 先导入被测模块，之后导入的 sys 不影响统计
+    code = f"import {module}\nimport sys\nprint(' '.join(sorted(sys.modules)))"
+    walls, imports, children, loaded = [], [], [], set()
+    for _ in range(repeat):
+        wall_ms, result = run_python(code)
+        if result.returncode != 0:
+            raise RuntimeError(f"导入 {module} 失败：{result.stderr.strip().splitlines()[-1]}")
+        import_ms, children = parse_importtime(result.stderr, module)
+        walls.append(wall_ms)
+        imports.append(import_ms)
+        loaded = set(result.stdout.split())
+
+    deferred = DEFERRED_MODULES.get(module, ())
+    return {
+        "module": module,
+        "import_ms": statistics.median(imports),
+        "wall_ms": statistics.median(walls),
+        "modules": len(loaded),
+        "top": [{"module": name, "ms": ms} for name, ms in children[:top]],
+        "eagerly_loaded": [name for name in deferred if name in loaded]
+    }
+
+
+def has_display() -> bool:
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def bench_window(repeat: int, timeout: float) -> dict:
+    """
+    测量从启动进程到登录窗口完成首次绘制、以及到后台预加载结束的时间（毫秒）
+    在临时目录中运行，避免创建配置文件时弹出提示框，也不会写入当前目录的日志
+    """
+    if not has_display():
+        return {"skipped": "没有图形界面（未设置 DISPLAY）"}
+
+    windows, preloads = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        config_path = os.path.join(ROOT, "config.yaml")
+        if os.path.exists(config_path):
+            shutil.copy(config_path, directory)
+        else:
+            with open(os.path.join(directory, "config.yaml"), "w", encoding="utf-8") as f:
+                f.write("{}\n")
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            process = subprocess.Popen(
+                [sys.executable, "-c", WINDOW_PROBE], cwd=directory, env=child_env(),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            # 窗口因弹出提示框等原因一直不退出时强制结束
+            watchdog = threading.Timer(timeout, process.kill)
+            watchdog.start()
+            marks: Dict[str, float] = {}
+            try:
+                for line in process.stdout:
+                    marks[line.strip()] = (time.perf_counter() - started) * 1000
+                stderr = process.stderr.read()
+                process.wait()
+            finally:
+                watchdog.cancel()
+
+            if "window" not in marks:
+                lines = stderr.strip().splitlines()
+                return {"skipped": f"无法打开登录窗口：{lines[-1] if lines else '超时'}"}
+            windows.append(marks["window"])
+            preloads.append(marks.get("preloaded", marks["window"]))
+
+    return {"window_ms": statistics.median(windows), "preloaded_ms": statistics.median(preloads)}
+
+
+def check_budgets(results: dict, import_budget: float, window_budget: float) -> List[str]:
+    """返回超出预算的各项说明"""
+    failures = []
+    for row in results["imports"]:
+        if row["eagerly_loaded"]:
+            failures.append(f"导入 {row['module']} 时提前加载了 {'、'.join(row['eagerly_loaded'])}")
+    gui = next((row for row in results["imports"] if row["module"] == "gui"), None)
+    if gui is not None and gui["import_ms"] > import_budget:
+        failures.append(f"导入 gui 耗时 {gui['import_ms']:.1f} ms，超出预算 {import_budget:.0f} ms")
+    window_ms: Optional[float] = results["window"].get("window_ms")
+    if window_ms is not None and window_ms > window_budget:
+        failures.append(f"登录窗口出现耗时 {window_ms:.1f} ms，超出预算 {window_budget:.0f} ms")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="测量导入耗时和登录窗口出现的时间")
+    parser.add_argument("--repeat", type=int, default=5, help="每项测量的次数，结果取中位数")
+    parser.add_argument("--modules", nargs="+", default=list(MODULES), help="测量导入耗时的模块")
+    parser.add_argument("--top", type=int, default=8, help="列出最耗时的直接依赖的个数")
+    parser.add_argument("--import-budget-ms", type=float, default=250.0, help="导入 gui 的耗时预算（毫秒）")
+    parser.add_argument("--window-budget-ms", type=float, default=1000.0,
+                        help="从启动进程到登录窗口出现的耗时预算（毫秒）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="等待登录窗口的最长时间（秒）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args()
+
+    try:
+        results = {
+            "interpreter_ms": bench_interpreter(args.repeat),
+            "imports": [bench_import(module, args.repeat, args.top) for module in args.modules],
+            "window": bench_window(args.repeat, args.timeout)
+        }
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    failures = check_budgets(results, args.import_budget_ms, args.window_budget_ms)
+    results["failures"] = failures
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 1 if failures else 0
+
+    print(f"空解释器启动：{results['interpreter_ms']:.1f} ms")
+    for row in results["imports"]:
+        print(f"导入 {row['module']}：{row['import_ms']:.1f} ms（进程总耗时 {row['wall_ms']:.1f} ms，"
+              f"共加载 {row['modules']} 个模块）")
+        for item in row["top"]:
+            print(f"  {item['ms']:>8.1f} ms  {item['module']}")
+    window = results["window"]
+    if "skipped" in window:
+        print(f"登录窗口：已跳过，{window['skipped']}")
+    else:
+        print(f"登录窗口：{window['window_ms']:.1f} ms 出现，{window['preloaded_ms']:.1f} ms 预加载完成")
+    for failure in failures:
+        print(f"超出预算：{failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple
+from cache import BootstrapCache
+from course_selection import CourseSelection
+from journal import JOURNAL
+from login import Login
+from session_store import SessionStore
+
+
+def bootstrap(
+    username: str,
+    password: str,
+    store: Optional[SessionStore] = None,
+    cache: Optional[BootstrapCache] = None,
+    progress: Callable[[str], None] = print
+) -> Tuple[Login, CourseSelection]:
+    """
+    登录并准备好抢课所需的数据
+    登录过程本身必须依次进行；拿到token后再取批次信息，之后各类课程的教学班ID前缀和已选课程
+    互不依赖，同时查询。总耗时约等于最长的一条依赖链：登录 -> 批次 -> 最慢的一个查询
+
+    Args:
+        username: 学号
+        password: 密码
+        store: 登录状态存储，可恢复时跳过完整登录
+        cache: 批次信息和教学班ID前缀的磁盘缓存
+        progress: 接收各阶段进度提示的函数，在调用 bootstrap 的线程中调用
+
+    Returns:
+        (登录客户端, 选课客户端)
+
+    Raises:
+        Exception: 登录或获取批次信息失败
+    """
+    started_at = time.monotonic()
+    progress("正在登录...")
+    client = Login()
+    success, message = client.login_process(username, password, store=store)
+    JOURNAL.record("login", r="bootstrap", o="ok" if success else "failed", l=time.monotonic() - started_at, m=message)
+    if not success:
+        raise Exception(message)
+    progress(f"{message}：{client.name}，正在获取选课批次...")
+
+    course_client = CourseSelection(
+        session=client.session,
+        token=client.token,
+        ticket=client.ticket,
+        student_code=username,
+        cache=cache
+    )
+
+    tasks = {f"{course_type}课程前缀": (course_client.get_prefix, course_type)
+             for course_type in course_client.CLASS_TYPES}
+    tasks["已选课程"] = (course_client.get_selected_courses,)
+    done = 0
+    progress(f"正在加载课程前缀和已选课程（0/{len(tasks)}）...")
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="bootstrap") as executor:
+        futures = {executor.submit(*task): name for name, task in tasks.items()}
+        for future in as_completed(futures):
+            done += 1
+            try:
+                future.result()
+            except Exception as e:
+                # 这些数据都能在抢课时按需再取，失败不影响登录
+                progress(f"加载{futures[future]}失败：{str(e)}")
+            progress(f"正在加载课程前缀和已选课程（{done}/{len(tasks)}）...")
+
+    progress(f"准备完成，已选 {len(course_client.selected_courses)} 门课程，"
+             f"用时 {time.monotonic() - started_at:.1f} 秒")
+    return client, course_client
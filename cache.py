@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, Tuple
+from clock_sync import parse_server_time
+
+DEFAULT_PATH = "bootstrap_cache.json"
+
+
+class BootstrapCache:
+    """
+    选课初始化数据的磁盘缓存
+    按学号保存可用的选课批次信息，按学号和批次保存各课程类型的教学班ID前缀，
+    重新登录或重启程序时直接使用，不必再请求服务器
+
+    批次信息在超过有效期或批次已结束时失效，前缀在超过有效期时失效
+    """
+    def __init__(self, path: str = DEFAULT_PATH, batch_ttl: float = 6 * 3600, prefix_ttl: float = 24 * 3600):
+        """
+        Args:
+            path: 缓存文件路径
+            batch_ttl: 批次信息的有效期（秒）
+            prefix_ttl: 教学班ID前缀的有效期（秒）
+        """
+        self.path = path
+        self.batch_ttl = batch_ttl
+        self.prefix_ttl = prefix_ttl
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def get_batch(self, student_code: str) -> Optional[Tuple[str, dict]]:
+        """返回缓存的 (批次代码, 批次信息)，不存在或已失效时返回None"""
+        with self._lock:
+            entry = self._data.get(student_code, {}).get("batch")
+        if not entry or time.time() - entry["cached_at"] > self.batch_ttl:
+            return None
+        if _batch_ended(entry["batch_info"]):
+            return None
+        return entry["batch_code"], entry["batch_info"]
+
+    def set_batch(self, student_code: str, batch_code: str, batch_info: dict) -> None:
+        with self._lock:
+            student = self._data.setdefault(student_code, {})
+            student["batch"] = {
+                "batch_code": batch_code,
+                "batch_info": batch_info,
+                "cached_at": time.time()
+            }
+            self._save()
+
+    def get_prefix(self, student_code: str, batch_code: str, course_type: str) -> Optional[str]:
+        """返回缓存的教学班ID前缀，不存在或已失效时返回None"""
+        with self._lock:
+            entry = self._data.get(student_code, {}).get("prefixes", {}).get(batch_code, {}).get(course_type)
+        if not entry or time.time() - entry["cached_at"] > self.prefix_ttl:
+            return None
+        return entry["prefix"]
+
+    def set_prefix(self, student_code: str, batch_code: str, course_type: str, prefix: str) -> None:
+        with self._lock:
+            prefixes = self._data.setdefault(student_code, {}).setdefault("prefixes", {})
+            # 只保留当前批次的前缀
+            batch_prefixes = prefixes.get(batch_code, {})
+            prefixes.clear()
+            prefixes[batch_code] = batch_prefixes
+            batch_prefixes[course_type] = {"prefix": prefix, "cached_at": time.time()}
+            self._save()
+
+    def invalidate(self, student_code: str) -> None:
+        """清除某个学号的全部缓存"""
+        with self._lock:
+            if self._data.pop(student_code, None) is not None:
+                self._save()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        # 先写临时文件再替换，避免写到一半时程序退出导致缓存损坏
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"写入缓存失败：{str(e)}")
+
+
+def _batch_ended(batch_info: dict) -> bool:
+    try:
+        end_time = parse_server_time(batch_info["end_time"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return time.time() > end_time
@@ -0,0 +1,298 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_PATH = "catalog.db"
+
+# 已选人数等字段变化频繁，不参与内容比对，否则每次同步都会被当作有变化
+VOLATILE_FIELDS = {
+    "numberOfSelected", "numberOfFirstVolunteer", "isFull", "isChoose", "isConflict", "conflictDesc"
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    batch_code TEXT NOT NULL,
+    course_type TEXT NOT NULL,
+    course_number TEXT NOT NULL,
+    course_name TEXT,
+    credit TEXT,
+    data_hash TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (batch_code, course_type, course_number)
+);
+CREATE TABLE IF NOT EXISTS teaching_classes (
+    batch_code TEXT NOT NULL,
+    teaching_class_id TEXT NOT NULL,
+    class_code TEXT NOT NULL,
+    course_type TEXT NOT NULL,
+    course_number TEXT NOT NULL,
+    teacher TEXT,
+    capacity INTEGER,
+    raw TEXT NOT NULL,
+    PRIMARY KEY (batch_code, teaching_class_id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    batch_code TEXT NOT NULL,
+    course_type TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (batch_code, course_type)
+);
+CREATE INDEX IF NOT EXISTS idx_courses_name ON courses (batch_code, course_name);
+CREATE INDEX IF NOT EXISTS idx_classes_code ON teaching_classes (batch_code, class_code);
+CREATE INDEX IF NOT EXISTS idx_classes_course ON teaching_classes (batch_code, course_type, course_number);
+"""
+
+
+class CourseCatalog:
+    """
+    本地课程目录
+    把recommendedCourse.do中各类课程的全部课程和教学班保存到SQLite中，按选课批次区分，
+    之后按课程代码或名称搜索、解析教学班ID都不需要再访问服务器
+
+    同步是增量的：在有效期内同步过的课程类型直接跳过；重新同步时只写入内容有变化的课程，
+    并删除服务器上已经不存在的课程
+    """
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def sync(
+        self,
+        batch_code: str,
+        fetch_page: Callable[[str, int, int], dict],
+        course_types: Iterable[str],
+        max_age: float = 3600,
+        force: bool = False,
+        page_size: int = 100
+    ) -> Dict[str, int]:
+        """
+        同步课程目录
+
+        Args:
+            batch_code: 选课批次代码
+            fetch_page: 查询函数 (课程类型, 页码, 每页数量) -> recommendedCourse.do的响应
+            course_types: 要同步的课程类型
+            max_age: 同步结果的有效期（秒），有效期内不再重复同步
+            force: 忽略有效期强制同步
+            page_size: 每页数量
+
+        Returns:
+            课程类型 -> 有变化的课程数，跳过的类型不包含在内
+        """
+        changed = {}
+        for course_type in course_types:
+            if not force and self._is_fresh(batch_code, course_type, max_age):
+                continue
+
+            courses = []
+            page_number = 0
+            while True:
+                result = fetch_page(course_type, page_number, page_size)
+                data_list = result.get("dataList") or []
+                courses.extend(data_list)
+                total = int(result.get("totalCount") or 0)
+                if not data_list or len(courses) >= total:
+                    break
+                page_number += 1
+
+            changed[course_type] = self._store(batch_code, course_type, courses)
+        return changed
+
+    def _is_fresh(self, batch_code: str, course_type: str, max_age: float) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at FROM sync_state WHERE batch_code = ? AND course_type = ?",
+                (batch_code, course_type)
+            ).fetchone()
+        return row is not None and time.time() - row["synced_at"] < max_age
+
+    def _store(self, batch_code: str, course_type: str, courses: List[dict]) -> int:
+        now = time.time()
+        changed = 0
+        with self._lock, self._conn:
+            known = dict(self._conn.execute(
+                "SELECT course_number, data_hash FROM courses WHERE batch_code = ? AND course_type = ?",
+                (batch_code, course_type)
+            ).fetchall())
+
+            seen = set()
+            for course in courses:
+                course_number = course.get("courseNumber", "")
+                seen.add(course_number)
+                data_hash = _content_hash(course)
+                if known.get(course_number) == data_hash:
+                    continue
+
+                changed += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO courses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (batch_code, course_type, course_number, course.get("courseName"),
+                     course.get("credit"), data_hash, now)
+                )
+                self._conn.execute(
+                    "DELETE FROM teaching_classes WHERE batch_code = ? AND course_type = ? AND course_number = ?",
+                    (batch_code, course_type, course_number)
+                )
+                for teaching_class in course.get("tcList") or []:
+                    teaching_class_id = teaching_class.get("teachingClassID", "")
+                    # 教学班ID = 学期前缀 + 课程号 + 班号，去掉前缀即为界面中填写的课程代码
+                    position = teaching_class_id.find(course_number)
+                    class_code = teaching_class_id[position:] if position >= 0 else teaching_class_id
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO teaching_classes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (batch_code, teaching_class_id, class_code, course_type, course_number,
+                         teaching_class.get("teacherName"), int(teaching_class.get("classCapacity") or 0),
+                         json.dumps(teaching_class, ensure_ascii=False))
+                    )
+
+            for course_number in set(known) - seen:
+                changed += 1
+                self._conn.execute(
+                    "DELETE FROM courses WHERE batch_code = ? AND course_type = ? AND course_number = ?",
+                    (batch_code, course_type, course_number)
+                )
+                self._conn.execute(
+                    "DELETE FROM teaching_classes WHERE batch_code = ? AND course_type = ? AND course_number = ?",
+                    (batch_code, course_type, course_number)
+                )
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                (batch_code, course_type, len(courses), now)
+            )
+        return changed
+
+    def search(
+        self,
+        batch_code: str,
+        query: str,
+        course_type: Optional[str] = None,
+        limit: int = 50
+    ) -> List[dict]:
+        """
+        按课程代码、课程号或课程名称搜索教学班
+
+        Returns:
+            [{'class_code', 'teaching_class_id', 'course_type', 'course_number', 'course_name', 'teacher', 'capacity'}]
+        """
+        sql = (
+            "SELECT t.class_code, t.teaching_class_id, t.course_type, t.course_number, "
+            "c.course_name, t.teacher, t.capacity "
+            "FROM teaching_classes t JOIN courses c "
+            "ON c.batch_code = t.batch_code AND c.course_type = t.course_type AND c.course_number = t.course_number "
+            "WHERE t.batch_code = ? AND (t.class_code LIKE ? OR c.course_name LIKE ?)"
+        )
+        pattern = f"%{query}%"
+        params = [batch_code, f"{query}%", pattern]
+        if course_type:
+            sql += " AND t.course_type = ?"
+            params.append(course_type)
+        sql += " ORDER BY t.class_code LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def resolve(self, batch_code: str, class_code: str, course_type: Optional[str] = None) -> Optional[dict]:
+        """根据课程代码查找教学班，找不到时返回None"""
+        sql = ("SELECT class_code, teaching_class_id, course_type, course_number, teacher, capacity "
+               "FROM teaching_classes WHERE batch_code = ? AND class_code = ?")
+        params = [batch_code, class_code]
+        if course_type:
+            sql += " AND course_type = ?"
+            params.append(course_type)
+
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def latest_batch(self) -> Optional[str]:
+        """最近一次同步的选课批次"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT batch_code FROM sync_state ORDER BY synced_at DESC LIMIT 1"
+            ).fetchone()
+        return row["batch_code"] if row is not None else None
+
+
+def _content_hash(course: dict) -> str:
+    stable = dict(course)
+    stable["tcList"] = [
+        {k: v for k, v in teaching_class.items() if k not in VOLATILE_FIELDS}
+        for teaching_class in course.get("tcList") or []
+    ]
+    content = json.dumps(stable, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def sync_with_login(catalog: CourseCatalog, config_path: str, force: bool = False) -> Dict[str, int]:
+    """
+    不打开界面，按配置文件中的账号登录后同步课程目录，供没有图形界面的服务器使用
+
+    Raises:
+        Exception: 配置文件有误、登录或查询失败
+    """
+    # 只在同步时导入，离线搜索用不到登录和网络相关的模块
+    from bootstrap import bootstrap
+    from cache import BootstrapCache
+    from config import load_config
+    from session_store import SessionStore
+
+    config = load_config(config_path)
+    _, client = bootstrap(config.username, config.password, store=SessionStore(), cache=BootstrapCache())
+
+    def fetch_page(course_type: str, page_number: int, page_size: int) -> dict:
+        return client.query_courses(client.student_code, client.batch_code, course_type, "", page_size, page_number)
+
+    return catalog.sync(client.batch_code, fetch_page, client.CLASS_TYPES, force=force)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线搜索本地课程目录")
+    parser.add_argument("query", nargs="?", help="课程代码、课程号或课程名称")
+    parser.add_argument("--type", dest="course_type", choices=["major", "elective", "physical", "program"])
+    parser.add_argument("--batch", help="选课批次代码，默认使用最近同步的批次")
+    parser.add_argument("--db", default=DEFAULT_PATH, help="目录数据库路径")
+    parser.add_argument("--sync", action="store_true", help="先按配置文件中的账号登录并同步课程目录")
+    parser.add_argument("--force", action="store_true", help="与 --sync 一起使用，忽略有效期强制同步")
+    parser.add_argument("--config", default="config.yaml", help="与 --sync 一起使用的配置文件路径")
+    args = parser.parse_args()
+    if not args.query and not args.sync:
+        parser.error("请输入搜索内容，或使用 --sync 同步课程目录")
+
+    catalog = CourseCatalog(args.db)
+    if args.sync:
+        try:
+            changed = sync_with_login(catalog, args.config, force=args.force)
+        except Exception as e:
+            print(f"课程目录同步失败：{str(e)}")
+            return
+        summary = "，".join(f"{course_type} {count}门有更新" for course_type, count in changed.items())
+        print(f"课程目录同步完成：{summary or '均在有效期内，未重新同步'}")
+        if not args.query:
+            return
+
+    batch_code = args.batch or catalog.latest_batch()
+    if not batch_code:
+        print("本地目录为空，请先在选课界面中同步课程目录，或运行 python catalog.py --sync")
+        return
+
+    for row in catalog.search(batch_code, args.query, args.course_type):
+        print(f"{row['class_code']}\t{row['course_type']}\t{row['course_name']}\t{row['teacher'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import queue
+import sys
+import time
+from typing import Optional, Tuple
+from bootstrap import bootstrap
+from cache import BootstrapCache
+from config import DEFAULT_PATH as DEFAULT_CONFIG_PATH, Config, ConfigError, ConfigWatcher, diff_courses, load_config
+from course_selection import ALREADY_SELECTED, SELECTED
+from engine import SelectionEngine, course_group
+from journal import DEFAULT_PATH as DEFAULT_JOURNAL_PATH, JOURNAL
+from log_sink import DEFAULT_PATH as DEFAULT_LOG_PATH, LogSink
+from metrics import METRICS
+from profiling import Profiler
+from session_manager import SessionManager
+from session_store import SessionStore
+
+# 退出码
+EXIT_ALL_SELECTED = 0
+EXIT_NOT_ALL_SELECTED = 1
+EXIT_SETUP_FAILED = 2
+EXIT_INTERRUPTED = 130
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="无界面选课：按配置文件中的课程列表抢课，全部选上后退出")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH, help="配置文件路径，运行中修改后课程列表和速率设置立即生效")
+    parser.add_argument("--json", action="store_true", help="以JSON行的形式输出日志")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_PATH, help="日志文件路径，设为空字符串则不写文件")
+    parser.add_argument("--timeout", type=float, default=0, help="最长运行时间（秒），0表示不限制")
+    parser.add_argument("--journal", default=DEFAULT_JOURNAL_PATH,
+                        help="逐条记录请求的日志路径，设为空字符串则不记录；用 python journal.py 分析")
+    parser.add_argument("--profile", default="",
+                        help="开启性能分析，逗号分隔的 cpu、memory、threads，覆盖配置文件中的 profiling 设置")
+    parser.add_argument("--profile-dir", default="", help="性能分析结果的目录，默认使用配置文件中的设置")
+    parser.add_argument("--metrics-out", default="", help="退出时导出请求指标，.json 为JSON，其余为Prometheus文本格式")
+    return parser.parse_args(argv)
+
+
+class Runner:
+    """无界面的选课流程，只依赖登录、选课客户端和选课引擎，不加载任何界面库"""
+    def __init__(self, config: Config, sink: LogSink, as_json: bool = False,
+                 watcher: Optional[ConfigWatcher] = None):
+        """
+        Args:
+            config: 启动时读取的配置
+            sink: 日志管道
+            as_json: 是否以JSON行的形式输出日志
+            watcher: 配置文件监视器，配置变化时课程列表和速率设置立即生效
+        """
+        self.config = config
+        self.sink = sink
+        self.as_json = as_json
+        self.watcher = watcher
+
+    def print_logs(self) -> None:
+        for event in self.sink.drain():
+            print(json.dumps(event, ensure_ascii=False) if self.as_json else LogSink.format(event), flush=True)
+
+    def log(self, message: str, **fields) -> None:
+        self.sink.emit(message, **fields)
+        self.print_logs()
+
+    def run(self, timeout: float = 0) -> int:
+        config = self.config
+        if not config.courses:
+            self.log("配置文件中没有有效的课程", level="error")
+            return EXIT_SETUP_FAILED
+
+        store = SessionStore()
+        try:
+            client, course_client = bootstrap(
+                config.username, config.password, store=store, cache=BootstrapCache(), progress=self.log
+            )
+        except Exception as e:
+            self.log(f"登录失败：{str(e)}", level="error")
+            return EXIT_SETUP_FAILED
+
+        sessions = SessionManager(
+            config.username, config.password, course_client, store=store,
+            refresh_interval=config.session.refresh_interval,
+            check_interval=config.session.check_interval,
+            logged_in_at=client.logged_in_at
+        )
+        engine = SelectionEngine.from_config(sessions, config, sink=self.sink)
+        sessions.log = engine.log
+        engine.start()
+        sessions.start()
+        engine.schedule_opening(config.opening)
+
+        # 以课程组本身作为任务的 key，配置文件修改后据此找出增减的课程
+        courses = list(config.courses)
+        for course in courses:
+            engine.watch_group(course, course_group(course))
+
+        updates: "queue.Queue[Tuple[Config, Config]]" = queue.Queue()
+        if self.watcher is not None:
+            self.watcher.on_error = lambda message: self.log(message, level="error")
+            self.watcher.subscribe(lambda old, new: updates.put((old, new)))
+            self.watcher.start()
+
+        pending = set(courses)
+        selected = {}
+        deadline = time.monotonic() + timeout if timeout > 0 else None
+        exit_code = None
+        try:
+            while pending:
+                try:
+                    kind, data = engine.events.get(timeout=0.2)
+                    if kind == "result":
+                        key, course_code, outcome = data
+                        if outcome in (SELECTED, ALREADY_SELECTED) and key in pending:
+                            selected[key] = course_code
+                    elif kind == "finished":
+                        pending.discard(data)
+                except queue.Empty:
+                    pass
+
+                while not updates.empty():
+                    old, new = updates.get()
+                    engine.apply_config(new)
+                    added, removed = diff_courses(old, new)
+                    for course in removed:
+                        engine.cancel(course)
+                        courses.remove(course)
+                        pending.discard(course)
+                        selected.pop(course, None)
+                    for course in added:
+                        engine.watch_group(course, course_group(course))
+                        courses.append(course)
+                        pending.add(course)
+                    self.log(f"配置文件已更新：新增 {len(added)} 组课程，移除 {len(removed)} 组课程")
+                self.print_logs()
+
+                if deadline is not None and time.monotonic() > deadline:
+                    self.log("已到达最长运行时间，停止抢课")
+                    break
+        except KeyboardInterrupt:
+            self.log("已中断")
+            exit_code = EXIT_INTERRUPTED
+        finally:
+            if self.watcher is not None:
+                self.watcher.stop()
+            sessions.stop()
+            engine.stop()
+
+        codes = [selected[course] for course in courses if course in selected]
+        self.log(f"共选上 {len(codes)}/{len(courses)} 门课程：{'、'.join(codes) or '无'}",
+                 selected=codes, total=len(courses))
+        if exit_code is not None:
+            return exit_code
+        return EXIT_ALL_SELECTED if len(codes) == len(courses) else EXIT_NOT_ALL_SELECTED
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sink = LogSink(path=args.log_file or None)
+    runner = Runner(Config(), sink, as_json=args.json)
+    try:
+        runner.config = load_config(args.config)
+    except ConfigError as e:
+        runner.log(f"读取配置文件失败：{str(e)}", level="error")
+        sink.close()
+        return EXIT_SETUP_FAILED
+    runner.watcher = ConfigWatcher(runner.config, args.config)
+    profiling = runner.config.profiling
+    if args.profile:
+        kinds = {kind.strip() for kind in args.profile.split(",")}
+        profiling = profiling._replace(cpu="cpu" in kinds, memory="memory" in kinds, threads="threads" in kinds)
+    if args.profile_dir:
+        profiling = profiling._replace(directory=args.profile_dir)
+    profiler = Profiler(profiling, log=sink.emit)
+    profiler.start()
+    if args.journal:
+        JOURNAL.open(args.journal)
+
+    try:
+        return runner.run(timeout=args.timeout)
+    finally:
+        if args.metrics_out:
+            try:
+                METRICS.export(args.metrics_out)
+            except OSError as e:
+                runner.log(f"导出请求指标失败：{str(e)}", level="error")
+        profiler.stop()
+        JOURNAL.close()
+        sink.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+import datetime
+import math
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+# 选课系统返回的时间均为北京时间
+SERVER_TZ = datetime.timezone(datetime.timedelta(hours=8))
+
+
+def parse_server_time(text: str) -> float:
+    """把选课系统返回的 "YYYY-MM-DD HH:MM:SS" 转换为时间戳"""
+    return datetime.datetime.strptime(text, "%Y-%m-%d %H:%M:%S").replace(tzinfo=SERVER_TZ).timestamp()
+
+
+class ServerClock:
+    """
+    估计服务器时钟
+    响应的 Date 头只精确到秒，单次请求只能知道偏差所在的约1秒宽的区间；
+    每次采样都把请求安排在预计服务器时间恰好跨过整秒的时刻发出，
+    根据 Date 是否已经进位把区间缩小一半，几次采样后误差即接近网络往返时间的一半
+
+    内部以 time.monotonic() 为基准，不受本机系统时间调整的影响
+    """
+    def __init__(self):
+        # 服务器时间 = time.monotonic() + offset，校准前假定与本机时间一致
+        self.offset = time.time() - time.monotonic()
+        self.error: Optional[float] = None
+        self.rtt: Optional[float] = None
+        self._lower = -math.inf
+        self._upper = math.inf
+
+    def now(self) -> float:
+        """当前的服务器时间戳"""
+        return time.monotonic() + self.offset
+
+    def to_monotonic(self, server_time: float) -> float:
+        """把服务器时间戳换算为本机的 time.monotonic() 时刻"""
+        return server_time - self.offset
+
+    def observe(self, sent_at: float, received_at: float, date: Optional[str]) -> bool:
+        """
+        记录一次采样
+
+        Args:
+            sent_at: 发出请求时的 time.monotonic()
+            received_at: 收到响应时的 time.monotonic()
+            date: 响应的 Date 头
+
+        Returns:
+            Date 头是否有效
+        """
+        try:
+            server_second = parsedate_to_datetime(date).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+        # 服务器生成响应的时刻在 [sent_at, received_at] 之间，且其时间落在 [Date, Date + 1) 之内
+        lower = server_second - received_at
+        upper = server_second + 1 - sent_at
+        if lower > self._upper or upper < self._lower:
+            # 与之前的采样矛盾，说明某一方的时钟发生了跳变，重新开始
+            self._lower, self._upper = lower, upper
+        else:
+            self._lower = max(self._lower, lower)
+            self._upper = min(self._upper, upper)
+
+        rtt = received_at - sent_at
+        self.rtt = rtt if self.rtt is None else min(self.rtt, rtt)
+        self.offset = (self._lower + self._upper) / 2
+        self.error = (self._upper - self._lower) / 2
+        return True
+
+    def sync(self, fetch_date: Callable[[], Optional[str]], max_samples: int = 8,
+             precision: float = 0.005, timeout: float = 10) -> float:
+        """
+        校准时钟，返回服务器时间与本机时间之差（秒）
+
+        Args:
+            fetch_date: 发送一次请求并返回响应 Date 头的函数
+            max_samples: 最多采样次数，每次最多等待约1秒
+            precision: 误差小于该值（或网络往返时间的一半）时提前结束
+            timeout: 最长校准时间（秒），至少采样一次
+        """
+        deadline = time.monotonic() + timeout
+        self._lower, self._upper = -math.inf, math.inf
+        for _ in range(max_samples):
+            if self.error is not None and math.isfinite(self._upper - self._lower):
+                if self.error <= max(precision, (self.rtt or 0) / 2):
+                    break
+                # 下一次采样最多要等1秒
+                if time.monotonic() + 1 + self.rtt > deadline:
+                    break
+                # 在预计服务器时间刚好跨过整秒时到达
+                half_rtt = (self.rtt or 0) / 2
+                boundary = math.ceil(self.now() + half_rtt + 0.05)
+                delay = self.to_monotonic(boundary) - half_rtt - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            sent_at = time.monotonic()
+            date = fetch_date()
+            received_at = time.monotonic()
+            if not self.observe(sent_at, received_at, date):
+                raise ValueError("服务器响应中没有有效的 Date 头")
+
+        return self.offset - (time.time() - time.monotonic())
@@ -0,0 +1,300 @@
+import os
+import threading
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_PATH = "config.yaml"
+
+# 课程类型，对应 course_selection.CourseSelection.CLASS_TYPES 的键
+COURSE_TYPES = ("major", "elective", "physical", "program")
+
+# 配置文件不存在时写入的默认内容
+DEFAULT_CONFIG = {
+    'username': '',  # 默认空用户名
+    'password': '',  # 默认空密码
+    'courses': [
+        {'code': 'COMP30072701', 'type': 'major'},     # 计算机组成原理
+        {'code': 'CORE10010101', 'type': 'elective'},  # 大学英语
+        {'code': 'PHED10265003', 'type': 'physical'},  # 篮球
+        {'code': 'AUTO50112701', 'type': 'program'}    # 自动控制原理
+    ]
+}
+
+
+class ConfigError(ValueError):
+    """配置文件无法读取或内容不合法"""
+
+
+class CourseConfig(NamedTuple):
+    """
+    一组互为替代的教学班：codes 按优先级排列，组内共用课程类型和是否等待空位
+    replaces 不为空时为换课：等到 codes 中的教学班出现空位，再退掉已选的 replaces 并立即选课
+    """
+    codes: Tuple[str, ...]
+    course_type: str = "major"
+    watch: bool = False
+    replaces: str = ""
+
+
+class PacingConfig(NamedTuple):
+    """请求速率控制，见 scheduler.RequestScheduler"""
+    rps: float = 5.0
+    burst: float = 2.0
+    min_rps: float = 0.5
+    target_latency: float = 1.0
+
+
+class SessionConfig(NamedTuple):
+    """登录状态刷新，见 session_manager.SessionManager"""
+    refresh_interval: float = 25 * 60
+    check_interval: float = 60
+
+
+class OpeningConfig(NamedTuple):
+    """定时开抢，见 engine.SelectionEngine.open_at"""
+    enabled: bool = True
+    connections: int = 4
+    sync_lead: float = 60
+    refresh_lead: float = 20
+    prewarm_lead: float = 2
+
+
+class OnlineUsersConfig(NamedTuple):
+    """在线人数轮询，见 engine.SelectionEngine"""
+    interval: float = 1.0
+    max_interval: float = 30
+    timeout: float = 3
+
+
+class ProfilingConfig(NamedTuple):
+    """性能分析，见 profiling.Profiler；三项均为False时不做任何分析"""
+    cpu: bool = False
+    memory: bool = False
+    threads: bool = False
+    directory: str = "profiles"
+    interval: float = 60
+    window: float = 10
+    sample_interval: float = 0.01
+    top: int = 25
+
+
+class Config(NamedTuple):
+    username: str = ""
+    password: str = ""
+    courses: Tuple[CourseConfig, ...] = ()
+    pacing: PacingConfig = PacingConfig()
+    session: SessionConfig = SessionConfig()
+    opening: OpeningConfig = OpeningConfig()
+    online_users: OnlineUsersConfig = OnlineUsersConfig()
+    profiling: ProfilingConfig = ProfilingConfig()
+
+
+def _section(data: dict, name: str) -> dict:
+    section = data.get(name)
+    if section is None:
+        return {}
+    if not isinstance(section, dict):
+        raise ConfigError(f"{name} 必须是键值对")
+    return section
+
+
+def _number(section: dict, name: str, key: str, default: float, allow_zero: bool = False) -> float:
+    value = section.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ConfigError(f"{name}.{key} 必须是数字")
+    if value < 0 or (value == 0 and not allow_zero):
+        raise ConfigError(f"{name}.{key} 必须{'不小于' if allow_zero else '大于'}0")
+    return value
+
+
+def _numbers(data: dict, name: str, cls: type) -> Any:
+    """按 NamedTuple 的默认值读取一个全部由数字组成的配置段"""
+    section = _section(data, name)
+    return cls(**{key: _number(section, name, key, default) for key, default in cls._field_defaults.items()})
+
+
+def _courses(data: dict) -> Tuple[CourseConfig, ...]:
+    courses = data.get('courses') or []
+    if not isinstance(courses, list):
+        raise ConfigError("courses 必须是列表")
+
+    result = []
+    for index, course in enumerate(courses):
+        name = f"courses[{index}]"
+        if not isinstance(course, dict):
+            raise ConfigError(f"{name} 必须是键值对")
+        course_type = course.get('type', 'major')
+        if course_type not in COURSE_TYPES:
+            raise ConfigError(f"{name}.type 必须是 {'、'.join(COURSE_TYPES)} 之一")
+        alternatives = course.get('alternatives') or []
+        if not isinstance(alternatives, list):
+            raise ConfigError(f"{name}.alternatives 必须是列表")
+        codes = [course.get('code')] + alternatives
+        codes = tuple(dict.fromkeys(str(code).strip() for code in codes if code and str(code).strip()))
+        if not codes:
+            raise ConfigError(f"{name} 缺少课程代码")
+        replaces = str(course.get('replaces') or "").strip()
+        if replaces in codes:
+            raise ConfigError(f"{name}.replaces 不能与要选的教学班相同")
+        # 换课总是等到出现空位才退课
+        result.append(CourseConfig(codes, course_type, bool(course.get('watch')) or bool(replaces), replaces))
+    # 重复的课程组只保留一个
+    return tuple(dict.fromkeys(result))
+
+
+def parse_config(data: Optional[dict]) -> Config:
+    """
+    校验配置内容并转换为 Config，缺省项使用默认值
+
+    Raises:
+        ConfigError: 配置内容不合法，错误信息指出具体的配置项
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ConfigError("配置文件的顶层必须是键值对")
+
+    pacing = _numbers(data, 'pacing', PacingConfig)
+    if pacing.min_rps > pacing.rps:
+        raise ConfigError("pacing.min_rps 不能大于 pacing.rps")
+    online_users = _numbers(data, 'online_users', OnlineUsersConfig)
+    if online_users.max_interval < online_users.interval:
+        raise ConfigError("online_users.max_interval 不能小于 online_users.interval")
+
+    opening = _section(data, 'opening')
+    profiling = _section(data, 'profiling')
+    profiling = ProfilingConfig(
+        cpu=bool(profiling.get('cpu', False)),
+        memory=bool(profiling.get('memory', False)),
+        threads=bool(profiling.get('threads', False)),
+        directory=str(profiling.get('directory') or "profiles"),
+        interval=_number(profiling, 'profiling', 'interval', 60),
+        window=_number(profiling, 'profiling', 'window', 10),
+        sample_interval=_number(profiling, 'profiling', 'sample_interval', 0.01),
+        top=max(1, int(_number(profiling, 'profiling', 'top', 25)))
+    )
+    if profiling.window > profiling.interval:
+        raise ConfigError("profiling.window 不能大于 profiling.interval")
+    return Config(
+        username=str(data.get('username') or ""),
+        password=str(data.get('password') or ""),
+        courses=_courses(data),
+        pacing=pacing,
+        session=_numbers(data, 'session', SessionConfig),
+        opening=OpeningConfig(
+            enabled=bool(opening.get('enabled', True)),
+            connections=max(1, int(_number(opening, 'opening', 'connections', 4))),
+            sync_lead=_number(opening, 'opening', 'sync_lead', 60, allow_zero=True),
+            refresh_lead=_number(opening, 'opening', 'refresh_lead', 20, allow_zero=True),
+            prewarm_lead=_number(opening, 'opening', 'prewarm_lead', 2, allow_zero=True)
+        ),
+        online_users=online_users,
+        profiling=profiling
+    )
+
+
+def load_config(path: str = DEFAULT_PATH, create: bool = False) -> Config:
+    """
+    读取并校验配置文件，账号密码可用环境变量 XJTU_USERNAME / XJTU_PASSWORD 覆盖
+
+    Args:
+        path: 配置文件路径
+        create: 文件不存在时是否写入默认配置
+
+    Raises:
+        ConfigError: 文件无法读取或内容不合法
+    """
+    # 只在读取配置时导入，登录窗口出现前不必加载 yaml
+    import yaml
+
+    try:
+        if create and not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                yaml.dump(DEFAULT_CONFIG, f, allow_unicode=True, sort_keys=False)
+        with open(path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise ConfigError(str(e)) from e
+
+    config = parse_config(data)
+    return config._replace(
+        username=os.environ.get("XJTU_USERNAME", config.username),
+        password=os.environ.get("XJTU_PASSWORD", config.password)
+    )
+
+
+def diff_courses(old: Config, new: Config) -> Tuple[List[CourseConfig], List[CourseConfig]]:
+    """比较两份配置的课程列表，返回 (新增的课程组, 移除的课程组)"""
+    old_courses, new_courses = set(old.courses), set(new.courses)
+    return (
+        [course for course in new.courses if course not in old_courses],
+        [course for course in old.courses if course not in new_courses]
+    )
+
+
+class ConfigWatcher:
+    """
+    监视配置文件的变化
+    后台线程定时比较文件的修改时间和大小，只有发生变化时才重新读取；
+    新内容通过校验后才替换当前配置并通知订阅者，不合法时保留原配置并报告错误
+    """
+    def __init__(self, config: Config, path: str = DEFAULT_PATH, interval: float = 1.0,
+                 on_error: Callable[[str], None] = print):
+        """
+        Args:
+            config: 当前配置，即启动时 load_config 读取的结果
+            path: 配置文件路径
+            interval: 检查间隔（秒）
+            on_error: 重新读取失败时接收错误信息的函数
+        """
+        self.config = config
+        self.path = path
+        self.interval = interval
+        self.on_error = on_error
+        self._callbacks: List[Callable[[Config, Config], None]] = []
+        self._signature = self._stat()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[Config, Config], None]) -> None:
+        """配置变化后以 (旧配置, 新配置) 调用 callback，在监视线程中执行"""
+        self._callbacks.append(callback)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._watch_loop, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def check(self) -> bool:
+        """检查一次文件是否变化，返回是否应用了新配置"""
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+
+        try:
+            config = load_config(self.path)
+        except ConfigError as e:
+            self.on_error(f"配置文件有误，未应用修改：{str(e)}")
+            return False
+        if config == self.config:
+            return False
+
+        old, self.config = self.config, config
+        for callback in self._callbacks:
+            try:
+                callback(old, config)
+            except Exception as e:
+                self.on_error(f"应用新配置失败：{str(e)}")
+        return True
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _watch_loop(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.check()
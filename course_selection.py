@@ -1,20 +1,143 @@
-import requests
 import json
+import threading
 import time
-from typing import Dict, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from cache import BootstrapCache
+from http_client import HttpClient, XKFW_URL
+from journal import JOURNAL
+
+# 选课结果分类
+SELECTED = "selected"                  # 选课成功
+ALREADY_SELECTED = "already_selected"  # 已经选上，无需再选
+FULL = "full"                          # 教学班已满，有人退课后可能成功
+NOT_OPEN = "not_open"                  # 不在选课时间内
+CLOSED = "closed"                      # 选课已经结束
+SESSION_EXPIRED = "session_expired"    # 登录失效，重新登录后重试
+RATE_LIMITED = "rate_limited"          # 请求过于频繁，降速后重试
+CONFLICT = "conflict"                  # 与已选课程时间冲突
+INVALID = "invalid"                    # 教学班不存在或不允许选择
+LIMIT_EXCEEDED = "limit_exceeded"      # 超出学分或门数上限
+DROPPED = "dropped"                    # 退课成功
+NOT_HELD = "not_held"                  # 退课时并未选上该教学班
+UNKNOWN = "unknown"                    # 无法识别，按可重试处理
+
+# 选课接口的操作类型
+ADD = "1"   # 选课
+DROP = "2"  # 退课
+
+# 重试也不可能成功的结果
+TERMINAL_OUTCOMES = frozenset({ALREADY_SELECTED, CONFLICT, INVALID, LIMIT_EXCEEDED, NOT_HELD, CLOSED})
+
+# 按顺序匹配失败消息中的关键字，先匹配到的优先；
+# 很多失败消息都含有"已选"（如"与已选课程时间冲突"、"已选学分超出上限"、"已选人数已达到课容量"），
+# 冲突、容量和上限必须排在已选上之前，已选上也只匹配重复选课的说法
+CLASSIFICATION = (
+    (("登录者身份", "登录失效", "重新登录", "未登录"), SESSION_EXPIRED),
+    (("时间冲突", "冲突"), CONFLICT),
+    (("已结束", "已截止"), CLOSED),
+    (("不在选课时间", "未开始", "未开放"), NOT_OPEN),
+    (("频繁", "过快", "稍后"), RATE_LIMITED),
+    (("已满", "容量不足", "人数已达上限", "余量不足", "课容量"), FULL),
+    (("学分上限", "门数上限", "超出", "超过"), LIMIT_EXCEEDED),
+    (("重复选", "该课程已选", "已选择该课程", "已在选课结果中"), ALREADY_SELECTED),
+    (("不存在", "不允许", "不能选", "无权", "不符合"), INVALID),
+)
+
+# 退课的失败消息先按此匹配："已选课程中不存在该教学班"同时含有"已选"和"不存在"，
+# 必须在 CLASSIFICATION 之前识别为未持有，其余退课失败（如不允许退课）仍按 CLASSIFICATION 分类
+DROP_CLASSIFICATION = (
+    (("已选课程中不存在", "未选", "没有选", "尚未选"), NOT_HELD),
+) + CLASSIFICATION
+
+
+class SelectResult(NamedTuple):
+    """一次选课请求的结果"""
+    outcome: str
+    code: str
+    msg: str
+
+    @property
+    def success(self) -> bool:
+        return self.outcome in (SELECTED, ALREADY_SELECTED)
+
+    @property
+    def terminal(self) -> bool:
+        return self.outcome in TERMINAL_OUTCOMES
+
+    def __str__(self) -> str:
+        return self.msg
+
+
+def classify(response: dict, classification: tuple = CLASSIFICATION) -> SelectResult:
+    """根据选课（或退课）接口返回的 code 和 msg 对结果分类"""
+    code = str(response.get("code", ""))
+    msg = str(response.get("msg") or "")
+    if code == "1":
+        return SelectResult(SELECTED, code, msg)
+    for keywords, outcome in classification:
+        if any(keyword in msg for keyword in keywords):
+            return SelectResult(outcome, code, msg)
+    return SelectResult(UNKNOWN, code, msg)
+
+
+VOLUNTEER_URL = f"{XKFW_URL}/xsxkapp/sys/xsxkapp/elective/volunteer.do"
+VOLUNTEER_ENDPOINT = "elective/volunteer.do"
+DELETE_VOLUNTEER_URL = f"{XKFW_URL}/xsxkapp/sys/xsxkapp/elective/deleteVolunteer.do"
+DELETE_VOLUNTEER_ENDPOINT = "elective/deleteVolunteer.do"
+
+
+class SelectionTarget:
+    """
+    一个抢课目标（教学班），或换课时要退掉的教学班（operation 为 DROP）
+    第一次提交时构造好完整的选课请求（请求头、编码后的请求体）并保存，之后的提交直接发送；
+    换用新的登录会话或Cookie发生变化后自动重新构造
+    """
+    __slots__ = ("class_code", "course_type", "operation", "owner", "cookie_version", "request", "send_kwargs")
+
+    def __init__(self, class_code: str, course_type: str, operation: str = ADD):
+        self.class_code = class_code
+        self.course_type = course_type
+        self.operation = operation
+        self.owner: Optional["CourseSelection"] = None
+        self.cookie_version = -1
+        self.request = None
+        self.send_kwargs: dict = {}
+
+
+class SwapResult(NamedTuple):
+    """
+    一次换课的结果
+
+    Attributes:
+        dropped: 退课请求的结果
+        added: 选课请求的结果，退课失败时为None，请求出错时为 UNKNOWN
+        restored: 选课失败后重新选回原教学班的结果，不需要选回时为None
+        elapsed: 从发出退课请求到选课（或选回）完成的时间（秒），即两个教学班都不持有的最长时间
+    """
+    dropped: SelectResult
+    added: Optional[SelectResult] = None
+    restored: Optional[SelectResult] = None
+    elapsed: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.added is not None and self.added.success
+
 
 class CourseSelection:
-    def __init__(self, cookies: Dict[str, str], token: str, ticket: str, student_code: str):
+    def __init__(self, session: HttpClient, token: str, ticket: str, student_code: str,
+                 cache: Optional[BootstrapCache] = None):
         """
         初始化选课客户端
         
         Args:
-            cookies: Cookie信息
+            session: 登录时建立的共享HTTP会话
             token: 用户token
             ticket: 用户ticket
             student_code: 学生学号
+            cache: 批次信息和教学班ID前缀的磁盘缓存，为空时每次都向服务器查询
         """
-        self.cookies = cookies
+        self.session = session
         self.token = token
         self.ticket = ticket
         self.student_code = student_code
@@ -26,10 +149,158 @@ class CourseSelection:
             "program": "FANKC"   # 方案内课程
         }
         
-        self.batch_code, self.batch_info = self.get_available_batch(student_code)
-        self.TERM_PREFIX = self.get_course_prefix(student_code, self.batch_code)
+        self.cache = cache
+        
+        cached_batch = cache.get_batch(student_code) if cache else None
+        if cached_batch:
+            self.batch_code, self.batch_info = cached_batch
+        else:
+            self.batch_code, self.batch_info = self.get_available_batch(student_code)
+            if cache:
+                cache.set_batch(student_code, self.batch_code, self.batch_info)
+        
+        # 各课程类型的教学班ID前缀，首次用到时才查询
+        self.TERM_PREFIX: Dict[str, str] = {}
+        # 每类课程一把锁，不同类型的前缀可以同时查询
+        self._prefix_locks = {course_type: threading.RLock() for course_type in self.CLASS_TYPES}
+        # 已选课程，由 get_selected_courses 更新
+        self.selected_courses: List[dict] = []
+        # 教学班代码 -> 上课时间地点（teachingPlace），查询已选课程和教学班容量时顺便记录
+        self.teaching_places: Dict[str, str] = {}
 
-    def select_course(self, class_code: str, course_type: str) -> str:
+    def get_prefix(self, course_type: str) -> str:
+        """
+        获取某类课程的教学班ID前缀，依次使用内存、磁盘缓存和服务器查询结果
+        该类课程查不到任何课程时退回使用主修课程的前缀
+        """
+        prefix = self.TERM_PREFIX.get(course_type)
+        if prefix is not None:
+            return prefix
+        
+        with self._prefix_locks[course_type]:
+            if course_type in self.TERM_PREFIX:
+                return self.TERM_PREFIX[course_type]
+            
+            prefix = self.cache.get_prefix(self.student_code, self.batch_code, course_type) if self.cache else None
+            if prefix is None:
+                try:
+                    prefix = self.get_course_prefix(self.student_code, self.batch_code, course_type)
+                except Exception:
+                    if course_type == "major":
+                        raise
+                    prefix = None
+                
+                if prefix is not None and self.cache:
+                    self.cache.set_prefix(self.student_code, self.batch_code, course_type, prefix)
+            
+            if prefix is None:
+                prefix = self.get_prefix("major")
+            
+            self.TERM_PREFIX[course_type] = prefix
+            return prefix
+
+    def select_course(self, class_code: str, course_type: str) -> SelectResult:
+        started_at = time.monotonic()
+        try:
+            headers, data = self._selection_form(class_code, course_type)
+            response = self.session.post(VOLUNTEER_URL, headers=headers, data=data)
+            result = classify(response.json())
+        except Exception:
+            JOURNAL.record("select", c=class_code, o="error", l=time.monotonic() - started_at)
+            raise
+        JOURNAL.record("select", c=class_code, o=result.outcome, l=time.monotonic() - started_at)
+        return result
+
+    def select_target(self, target: SelectionTarget) -> SelectResult:
+        """
+        提交抢课目标中预先构造好的请求，重复提交时只发送请求并取出结果
+        退课目标（operation 为 DROP）退课成功时结果为 DROPPED，并未选上该教学班时为 NOT_HELD
+        """
+        started_at = time.monotonic()
+        kind = "drop" if target.operation == DROP else "select"
+        try:
+            if target.owner is not self or target.cookie_version != self.session.cookie_version:
+                self.prepare_target(target)
+            if target.operation == DROP:
+                endpoint, classification = DELETE_VOLUNTEER_ENDPOINT, DROP_CLASSIFICATION
+            else:
+                endpoint, classification = VOLUNTEER_ENDPOINT, CLASSIFICATION
+            response = self.session.send(target.request, endpoint, **target.send_kwargs)
+            result = classify(json.loads(response.content), classification)
+        except Exception:
+            JOURNAL.record(kind, c=target.class_code, o="error", l=time.monotonic() - started_at)
+            raise
+        if target.operation == DROP and result.outcome == SELECTED:
+            result = result._replace(outcome=DROPPED)
+        JOURNAL.record(kind, c=target.class_code, o=result.outcome, l=time.monotonic() - started_at)
+        return result
+
+    def prepare_target(self, target: SelectionTarget) -> None:
+        """为抢课目标构造选课或退课请求"""
+        headers, data = self._selection_form(target.class_code, target.course_type, target.operation)
+        target.cookie_version = self.session.cookie_version
+        if target.operation == DROP:
+            target.request, target.send_kwargs = self.session.prepare(
+                "GET", DELETE_VOLUNTEER_URL, headers=headers, params={"deleteParam": data["addParam"]}
+            )
+        else:
+            target.request, target.send_kwargs = self.session.prepare(
+                "POST", VOLUNTEER_URL, headers=headers, data=data
+            )
+        target.owner = self
+
+    def swap_targets(self, drop: SelectionTarget, add: SelectionTarget, restore: SelectionTarget,
+                     restore_attempts: int = 3) -> SwapResult:
+        """
+        换课：退掉 drop 后立即提交 add，没有选上时立即重新选回 restore（与 drop 是同一个教学班）
+        三个请求都预先构造好，并在同一个线程中连续发出，复用刚用过的连接，
+        两个请求之间不经过调度器和事件循环，尽量缩短两个教学班都不持有的时间
+
+        Args:
+            drop: 要退掉的已选教学班，operation 为 DROP
+            add: 要换成的教学班
+            restore: 选回原教学班的目标，operation 为 ADD
+            restore_attempts: 选回请求出错或请求过快时最多尝试的次数
+        """
+        for target in (drop, add, restore):
+            if target.owner is not self or target.cookie_version != self.session.cookie_version:
+                self.prepare_target(target)
+
+        started_at = time.monotonic()
+        result = self._swap(drop, add, restore, restore_attempts)
+        result = result._replace(elapsed=time.monotonic() - started_at)
+        outcome = result.added.outcome if result.added is not None else result.dropped.outcome
+        JOURNAL.record("swap", d=drop.class_code, c=add.class_code, o=outcome,
+                       r=result.restored.outcome if result.restored is not None else None, l=result.elapsed)
+        return result
+
+    def _swap(self, drop: SelectionTarget, add: SelectionTarget, restore: SelectionTarget,
+              restore_attempts: int) -> SwapResult:
+        dropped = self.select_target(drop)
+        if dropped.outcome != DROPPED:
+            return SwapResult(dropped)
+
+        try:
+            added = self.select_target(add)
+        except Exception as e:
+            # 不确定是否选上，按失败处理；若其实已选上，选回会因时间冲突等原因失败，不会同时持有两个
+            added = SelectResult(UNKNOWN, "", str(e))
+        if added.success:
+            return SwapResult(dropped, added)
+
+        restored = None
+        for attempt in range(restore_attempts):
+            try:
+                restored = self.select_target(restore)
+            except Exception as e:
+                restored = SelectResult(UNKNOWN, "", str(e))
+            if restored.success or restored.outcome not in (UNKNOWN, RATE_LIMITED):
+                break
+            time.sleep(0.05 * (attempt + 1))
+        return SwapResult(dropped, added, restored)
+
+    def _selection_form(self, class_code: str, course_type: str, operation: str = ADD) -> Tuple[dict, dict]:
+        """选课（或退课）请求的请求头和表单"""
         headers = {
             "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
             "token": self.token
@@ -41,10 +312,10 @@ class CourseSelection:
         data = {
             "addParam": json.dumps({
                 "data": {
-                    "operationType": "1",
+                    "operationType": operation,
                     "studentCode": self.student_code,
                     "electiveBatchCode": self.batch_code,
-                    "teachingClassId": f"{self.TERM_PREFIX}{class_code}",
+                    "teachingClassId": f"{self.get_prefix(course_type)}{class_code}",
                     "isMajor": "1",
                     "campus": "1",
                     "teachingClassType": self.CLASS_TYPES[course_type]
@@ -52,30 +323,27 @@ class CourseSelection:
             })
         }
         
-        response = requests.post(
-            "https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/elective/volunteer.do",
-            headers=headers,
-            cookies=self.cookies,
-            data=data
-        )
-        
-        return response.json()["msg"]
+        return headers, data
 
-    def get_person(self) -> dict:
+    def get_person(self, timeout: Optional[float] = None) -> int:
         headers = {
-            "Referer": f"http://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
         }
         
-        timestamp = int(time.time() * 1000)
-        response = requests.get(
-            f"https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/publicinfo/onlineUsers.do?timestamp={timestamp}",
-            headers=headers,
-            cookies=self.cookies
-        )
+        response = self.session.get(self.online_users_url(), headers=headers, timeout=timeout)
         
         result = response.json()
         return result.get('data', {}).get('onlineUsers', 0)
 
+    def online_users_url(self) -> str:
+        timestamp = int(time.time() * 1000)
+        return f"{XKFW_URL}/xsxkapp/sys/xsxkapp/publicinfo/onlineUsers.do?timestamp={timestamp}"
+
+    def server_date(self) -> Optional[str]:
+        """发送一次轻量请求，返回响应的 Date 头，用于校准时钟"""
+        response = self.session.get(self.online_users_url(), timeout=5)
+        return response.headers.get("Date")
+
     def get_batch_info(self, student_code: str) -> dict:
         response = self._get_raw_batch_info(student_code)
         if response['code'] != '1':
@@ -122,28 +390,34 @@ class CourseSelection:
             "X-Requested-With": "XMLHttpRequest",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "token": self.token,
-            "Referer": f"https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
         }
         
         timestamp = int(time.time() * 1000)
-        response = requests.get(
-            f"https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/student/{student_code}.do?timestamp={timestamp}",
-            headers=headers,
-            cookies=self.cookies
+        response = self.session.get(
+            f"{XKFW_URL}/xsxkapp/sys/xsxkapp/student/{student_code}.do?timestamp={timestamp}",
+            headers=headers
         )
         
         return response.json()
 
-    def major_course(self, class_code: str) -> str:
+    def is_session_valid(self) -> bool:
+        """用一次学生信息查询检查当前登录状态是否仍然有效"""
+        try:
+            return self._get_raw_batch_info(self.student_code).get('code') == '1'
+        except Exception:
+            return False
+
+    def major_course(self, class_code: str) -> SelectResult:
         return self.select_course(class_code, "major")
         
-    def elective_course(self, class_code: str) -> str:
+    def elective_course(self, class_code: str) -> SelectResult:
         return self.select_course(class_code, "elective")
         
-    def physical_course(self, class_code: str) -> str:
+    def physical_course(self, class_code: str) -> SelectResult:
         return self.select_course(class_code, "physical")
         
-    def program_course(self, class_code: str) -> str:
+    def program_course(self, class_code: str) -> SelectResult:
         return self.select_course(class_code, "program")
 
     def get_available_batch(self, student_code: str) -> Tuple[str, dict]:
@@ -157,13 +431,25 @@ class CourseSelection:
                 
         raise Exception("未找到可用的选课批次")
 
-    def get_course_prefix(self, student_code: str, batch_code: str, course_type: str = "major") -> str:
+    def query_courses(self, student_code: str, batch_code: str, course_type: str,
+                      query_content: str = "", page_size: int = 10, page_number: int = 0) -> dict:
+        """
+        查询可选课程列表（recommendedCourse.do）
+        
+        Args:
+            student_code: 学生学号
+            batch_code: 选课批次代码
+            course_type: 课程类型
+            query_content: 搜索内容，课程代码或名称
+            page_size: 每页数量
+            page_number: 页码，从0开始
+        """
         headers = {
             "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
             "Accept": "application/json, text/javascript, */*; q=0.01",
             "X-Requested-With": "XMLHttpRequest",
             "token": self.token,
-            "Referer": f"https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/*default/grablessons.do?token={self.token}"
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/grablessons.do?token={self.token}"
         }
         
         query_data = {
@@ -175,10 +461,10 @@ class CourseSelection:
                 "teachingClassType": self.CLASS_TYPES[course_type],
                 "checkConflict": "2",
                 "checkCapacity": "2",
-                "queryContent": ""
+                "queryContent": query_content
             },
-            "pageSize": "10",
-            "pageNumber": "0",
+            "pageSize": str(page_size),
+            "pageNumber": str(page_number),
             "order": ""
         }
         
@@ -186,10 +472,9 @@ class CourseSelection:
             "querySetting": json.dumps(query_data)
         }
         
-        response = requests.post(
-            "https://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/elective/recommendedCourse.do",
+        response = self.session.post(
+            f"{XKFW_URL}/xsxkapp/sys/xsxkapp/elective/recommendedCourse.do",
             headers=headers,
-            cookies=self.cookies,
             data=data
         )
         
@@ -197,6 +482,61 @@ class CourseSelection:
         if result.get("code") != "1":
             raise Exception(f"获取课程信息失败：{result.get('msg')}")
         
+        return result
+
+    def get_selected_courses(self) -> List[dict]:
+        """
+        查询当前批次已选上的课程（courseResult.do），结果同时保存在 selected_courses 中
+
+        Returns:
+            每门课程的 class_code、teaching_class_id、course_number、course_name、teacher、
+            course_type（教学班类型代码）和 teaching_place
+        """
+        headers = {
+            "Accept": "application/json, text/javascript, */*; q=0.01",
+            "X-Requested-With": "XMLHttpRequest",
+            "token": self.token,
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/grablessons.do?token={self.token}"
+        }
+        
+        timestamp = int(time.time() * 1000)
+        response = self.session.get(
+            f"{XKFW_URL}/xsxkapp/sys/xsxkapp/elective/courseResult.do",
+            headers=headers,
+            params={
+                "timestamp": timestamp,
+                "studentCode": self.student_code,
+                "electiveBatchCode": self.batch_code
+            }
+        )
+        
+        result = response.json()
+        if result.get("code") != "1":
+            raise Exception(f"获取已选课程失败：{result.get('msg')}")
+        
+        courses = []
+        for item in result.get("dataList") or []:
+            teaching_class_id = item.get("teachingClassID", "")
+            course_number = item.get("courseNumber", "")
+            courses.append({
+                # 教学班ID = 前缀 + 课程号 + 两位教学班序号
+                "class_code": teaching_class_id[-(len(course_number) + 2):] if course_number else teaching_class_id,
+                "teaching_class_id": teaching_class_id,
+                "course_number": course_number,
+                "course_name": item.get("courseName", ""),
+                "teacher": item.get("teacherName", ""),
+                "course_type": item.get("teachingClassType", ""),
+                "teaching_place": item.get("teachingPlace", "")
+            })
+        
+        for course in courses:
+            self.teaching_places[course["class_code"]] = course["teaching_place"]
+        self.selected_courses = courses
+        return courses
+
+    def get_course_prefix(self, student_code: str, batch_code: str, course_type: str = "major") -> str:
+        result = self.query_courses(student_code, batch_code, course_type)
+        
         data_list = result.get("dataList", [])
         if not data_list:
             raise Exception("未找到任何课程信息")
@@ -206,4 +546,57 @@ class CourseSelection:
         teaching_class_id = first_class.get("teachingClassID", "")
         
         prefix = teaching_class_id.split(first_course["courseNumber"])[0]
-        return prefix
\ No newline at end of file
+        return prefix
+
+    @staticmethod
+    def course_number(class_code: str) -> str:
+        """教学班代码去掉末尾两位班号即为课程号，如 COMP30072701 -> COMP300727"""
+        return class_code[:-2]
+
+    def get_class_capacity(self, course_number: str, course_type: str) -> Dict[str, dict]:
+        """
+        查询一门课程下所有教学班的容量和已选人数，只需一次列表查询
+        
+        Args:
+            course_number: 课程号
+            course_type: 课程类型
+        
+        Returns:
+            教学班代码（不含学期前缀） -> {'capacity': 容量, 'selected': 已选人数, 'full': 是否已满,
+            'teaching_place': 上课时间地点}
+        """
+        result = self.query_courses(
+            self.student_code, self.batch_code, course_type,
+            query_content=course_number, page_size=50
+        )
+        
+        prefix = self.get_prefix(course_type)
+        classes = {}
+        for course in result.get("dataList", []):
+            if course.get("courseNumber") != course_number:
+                continue
+            for teaching_class in course.get("tcList") or []:
+                teaching_class_id = teaching_class.get("teachingClassID", "")
+                class_code = teaching_class_id[len(prefix):]
+                capacity = int(teaching_class.get("classCapacity") or 0)
+                selected = int(teaching_class.get("numberOfSelected") or 0)
+                teaching_place = teaching_class.get("teachingPlace") or ""
+                self.teaching_places[class_code] = teaching_place
+                classes[class_code] = {
+                    'capacity': capacity,
+                    'selected': selected,
+                    'full': teaching_class.get("isFull") == "1" or 0 < capacity <= selected,
+                    'teaching_place': teaching_place
+                }
+        return classes
+
+    def get_teaching_place(self, class_code: str, course_type: str) -> str:
+        """
+        教学班的上课时间地点，优先使用已记录的结果，否则查询一次所属课程的全部教学班
+
+        Returns:
+            teachingPlace，如"1-16周 星期一 第3-4节 主楼A-101"；查不到该教学班时为空字符串
+        """
+        if class_code not in self.teaching_places:
+            self.get_class_capacity(self.course_number(class_code), course_type)
+        return self.teaching_places.setdefault(class_code, "")
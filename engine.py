@@ -0,0 +1,815 @@
+import asyncio
+import datetime
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from clock_sync import SERVER_TZ, ServerClock, parse_server_time
+from config import Config, CourseConfig, OpeningConfig
+from course_selection import (
+    CLOSED, CONFLICT, DROP, NOT_HELD, NOT_OPEN, RATE_LIMITED, SESSION_EXPIRED, CourseSelection, SelectionTarget,
+    SelectResult
+)
+from journal import JOURNAL
+from log_sink import LogSink
+from scheduler import RequestScheduler
+from session_manager import SessionManager
+from timetable import Slot, Timetable, parse_schedule
+
+
+class TargetGroup:
+    """
+    一组互为替代的教学班（例如同一门课程的多个教学班），按优先级排列，选上其中一个即结束
+    整组只有一个抢课任务，请求量和调度份额不随备选数量增加
+
+    给出 replaces 时为换课：组内教学班出现空位后，先退掉已选的 replaces 再立即选课，没选上则选回 replaces
+    """
+    def __init__(self, targets: Iterable[Tuple[str, str]], wait_for_seat: bool = False, replaces: str = ""):
+        """
+        Args:
+            targets: (课程代码, 课程类型) 列表，越靠前优先级越高
+            wait_for_seat: 为True时只在出现空位后才提交
+            replaces: 换课时要退掉的已选教学班，与组内教学班同一课程类型；换课总是等待空位
+        """
+        self.targets: List[SelectionTarget] = [
+            SelectionTarget(course_code, course_type) for course_code, course_type in targets
+        ]
+        self.wait_for_seat = wait_for_seat or bool(replaces)
+        # 换课时退课和选回用的目标，请求都预先构造好
+        self.replaces: Optional[SelectionTarget] = None
+        self.restore: Optional[SelectionTarget] = None
+        if replaces and self.targets:
+            course_type = self.targets[0].course_type
+            self.replaces = SelectionTarget(replaces, course_type, DROP)
+            self.restore = SelectionTarget(replaces, course_type)
+        # 退课请求出错后无法确定是否已经退掉
+        self.drop_uncertain = False
+        # 查询到有空位的课程代码
+        self.available: Set[str] = set()
+        self.seat = asyncio.Event()
+        # 课程代码 -> 上课时间，由选课引擎在查到 teachingPlace 后填入
+        self.slots: Dict[str, Tuple[Slot, ...]] = {}
+        # 与已选课程时间冲突、暂不提交的课程代码 -> 与之冲突的已选课程
+        self.blocked: Dict[str, List[str]] = {}
+        self.unblocked = asyncio.Event()
+        self._next = 0
+
+    def candidates(self) -> List[SelectionTarget]:
+        """当前可以提交的教学班，即不与已选课程冲突的"""
+        return [target for target in self.targets if target.class_code not in self.blocked]
+
+    def pick(self) -> SelectionTarget:
+        """选出下一次提交的教学班：优先选有空位的最高优先级，否则轮流尝试"""
+        candidates = self.candidates()
+        for target in candidates:
+            if target.class_code in self.available:
+                return target
+        target = candidates[self._next % len(candidates)]
+        self._next += 1
+        return target
+
+    def remove(self, course_code: str) -> None:
+        self.targets = [target for target in self.targets if target.class_code != course_code]
+        self.available.discard(course_code)
+        self.blocked.pop(course_code, None)
+
+
+def course_groups(courses: Iterable[CourseConfig]) -> List[TargetGroup]:
+    """把配置文件中的课程组转换为抢课组"""
+    return [course_group(course) for course in courses]
+
+
+def course_group(course: CourseConfig) -> TargetGroup:
+    return TargetGroup([(code, course.course_type) for code in course.codes], course.watch, course.replaces)
+
+
+class SelectionEngine:
+    """
+    基于asyncio的选课引擎
+    在后台线程中运行一个事件循环，统一驱动所有课程的抢课、在线人数轮询和重新登录；
+    阻塞的HTTP请求放到有界线程池中执行，并用信号量限制同时在途的请求数；
+    每个请求发出前都要经过全局调度器，由调度器控制总请求速率和各课程之间的分配；
+    每次请求都从会话管理器取当前的选课客户端，重新登录后新会话立即对所有任务生效
+
+    引擎不直接操作界面：日志写入日志管道，其余输出以 (事件类型, 数据) 的形式放入 events 队列，
+    由界面线程自行取出处理：
+    - ("result", (key, 课程代码, 结果分类))：一次选课请求的结果；提交前发现与已选课程时间冲突时结果为 conflict
+    - ("selected", key)：该组已选上
+    - ("finished", key)：该组的抢课任务结束
+    - ("online_users", 人数)
+    """
+    def __init__(
+        self,
+        sessions: SessionManager,
+        scheduler: Optional[RequestScheduler] = None,
+        sink: Optional[LogSink] = None,
+        max_in_flight: int = 4,
+        online_interval: float = 1.0,
+        online_max_interval: float = 30,
+        online_timeout: float = 3,
+        relogin_interval: float = 5,
+        not_open_interval: float = 2
+    ):
+        """
+        Args:
+            sessions: 会话管理器
+            scheduler: 请求调度器，为空时使用默认配置
+            sink: 日志管道，为空时只在内存中排队、不写文件
+            max_in_flight: 同时在途的最大请求数
+            online_interval: 在线人数轮询间隔（秒）
+            online_max_interval: 服务器压力大时在线人数轮询间隔逐步加倍的上限（秒）
+            online_timeout: 在线人数请求的超时时间（秒）
+            relogin_interval: 重新登录失败后的最短重试间隔（秒）
+            not_open_interval: 服务器提示不在选课时间内、且无法定时开抢时暂停的时间（秒）
+        """
+        self.sessions = sessions
+        self.scheduler = scheduler or RequestScheduler()
+        self.sink = sink or LogSink(path=None)
+        self.max_in_flight = max_in_flight
+        self.online_interval = online_interval
+        self.online_max_interval = max(online_max_interval, online_interval)
+        self.online_timeout = online_timeout
+        self.online_users: Optional[int] = None
+        self.relogin_interval = relogin_interval
+        self.not_open_interval = not_open_interval
+
+        self.events: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        self.is_logged_in = True
+        # 每个任务的请求次数与排队等待时间，便于观察各课程之间的调度情况
+        self.stats: Dict[Any, Dict[str, float]] = {}
+
+        self._loop = asyncio.new_event_loop()
+        # 多留一个线程给重新登录，避免其占满请求线程
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight + 1,
+            thread_name_prefix="engine-io"
+        )
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._relogin_lock = asyncio.Lock()
+        self._last_relogin_attempt = 0.0
+        self._expired_generation = -1
+        self._tasks: Dict[Any, asyncio.Task] = {}
+        self._course_types: Dict[Any, Set[str]] = {}
+        self._groups: Dict[Any, TargetGroup] = {}
+        # 已选课程的课表，用于在提交前排除时间冲突的教学班；_timetable_source 为上次同步时的已选课程列表
+        self.timetable = Timetable()
+        self._timetable_source: Optional[List[dict]] = None
+        # 等待空位的抢课组
+        self._seat_watchers: Dict[Any, TargetGroup] = {}
+        # 等待空位的抢课组增减或有教学班解除冲突时置位，容量轮询在没有可查询的教学班时等待它
+        self._watchers_changed = asyncio.Event()
+        self._capacity_task: Optional[asyncio.Task] = None
+        # 定时开抢：开始前所有课程在此等待，不定时时始终处于打开状态
+        self.clock = ServerClock()
+        self._opened = asyncio.Event()
+        self._opened.set()
+        # 定时开抢前容量轮询在此等待：预建连接后放行一轮，开始时已知道哪些教学班有空位
+        self._prepoll = asyncio.Event()
+        self._prepoll.set()
+        self._opening_task: Optional[asyncio.Task] = None
+        self._opening_config = OpeningConfig()
+        self._opening_begin_time: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls, sessions: SessionManager, config: Config, sink: Optional[LogSink] = None) -> "SelectionEngine":
+        """根据配置文件创建选课引擎，pacing 部分用于调度器，online_users 部分用于在线人数轮询"""
+        return cls(
+            sessions,
+            scheduler=RequestScheduler.from_config(config.pacing),
+            sink=sink,
+            online_interval=config.online_users.interval,
+            online_max_interval=config.online_users.max_interval,
+            online_timeout=config.online_users.timeout
+        )
+
+    def apply_config(self, config: Config) -> None:
+        """
+        运行中应用新的配置：速率控制、在线人数轮询和登录状态刷新立即生效，不影响当前会话；
+        课程列表的变化由调用方通过 watch_group / cancel 应用，定时开抢的设置在下次安排时生效
+        """
+        def apply() -> None:
+            self.scheduler.configure(config.pacing)
+            self.online_interval = config.online_users.interval
+            self.online_max_interval = max(config.online_users.max_interval, config.online_users.interval)
+            self.online_timeout = config.online_users.timeout
+            self._opening_config = config.opening
+
+        self._loop.call_soon_threadsafe(apply)
+        self.sessions.refresh_interval = config.session.refresh_interval
+        self.sessions.check_interval = config.session.check_interval
+
+    @property
+    def course_client(self) -> CourseSelection:
+        return self.sessions.client
+
+    def start(self) -> None:
+        """启动事件循环线程"""
+        self._thread = threading.Thread(target=self._run, name="selection-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止所有任务并关闭事件循环"""
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        else:
+            self._executor.shutdown(wait=False)
+
+    def watch(self, key: Any, course_code: str, course_type: str, wait_for_seat: bool = False) -> None:
+        """
+        开始抢一门课程，key 用于之后取消该任务
+        wait_for_seat 为True时不盲目提交，先轮询教学班容量，出现空位后才提交选课请求
+        """
+        self.watch_group(key, TargetGroup([(course_code, course_type)], wait_for_seat))
+
+    def watch_group(self, key: Any, group: TargetGroup) -> None:
+        """开始抢一组互为替代的教学班，选上其中一个后其余自动放弃"""
+        self._loop.call_soon_threadsafe(self._start_group, key, group)
+
+    def open_at(
+        self,
+        begin_time: float,
+        connections: int = 4,
+        sync_lead: float = 60,
+        refresh_lead: float = 20,
+        prewarm_lead: float = 2
+    ) -> None:
+        """
+        定时开抢：在服务器时间到达 begin_time 之前，所有课程都不提交选课请求
+
+        Args:
+            begin_time: 选课开始的时间戳（服务器时间）
+            connections: 开始前预先建立的连接数
+            sync_lead: 提前多少秒根据响应的 Date 头校准服务器时钟
+            refresh_lead: 提前多少秒重新登录，保证开始时会话是新的
+            prewarm_lead: 提前多少秒预先建立连接
+        """
+        self._loop.call_soon_threadsafe(
+            self._start_opening, begin_time, connections, sync_lead, refresh_lead, prewarm_lead
+        )
+
+    def schedule_opening(self, opening: OpeningConfig = OpeningConfig()) -> bool:
+        """
+        根据配置文件中的 opening 部分，在当前批次尚未开始时定时开抢
+
+        Returns:
+            是否已安排定时开抢
+        """
+        self._opening_config = opening
+        try:
+            begin_time = parse_server_time(self.course_client.batch_info['begin_time'])
+        except (KeyError, TypeError, ValueError):
+            return False
+        if not opening.enabled or begin_time <= self.clock.now():
+            return False
+
+        self.open_at(
+            begin_time,
+            connections=opening.connections,
+            sync_lead=opening.sync_lead,
+            refresh_lead=opening.refresh_lead,
+            prewarm_lead=opening.prewarm_lead
+        )
+        return True
+
+    def cancel(self, key: Any) -> None:
+        """停止抢一门课程"""
+        self._loop.call_soon_threadsafe(self._cancel_course, key)
+
+    def submit(self, key: Any, func: Callable, *args) -> Future:
+        """在引擎中执行一次请求，同样受调度器控制；可在其他线程中调用并等待返回的Future"""
+        return asyncio.run_coroutine_threadsafe(self._call(key, func, *args), self._loop)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.create_task(self._online_users_loop())
+        self._loop.run_forever()
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+
+    async def _shutdown(self) -> None:
+        tasks = [task for task in asyncio.all_tasks(self._loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def _start_group(self, key: Any, group: TargetGroup) -> None:
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            return
+        self._course_types[key] = {target.course_type for target in group.targets}
+        self._tasks[key] = self._loop.create_task(self._group_loop(key, group))
+
+    def _start_opening(self, begin_time: float, *options) -> None:
+        if self._opening_task is not None and not self._opening_task.done():
+            # 多门课程同时发现批次未开始时只安排一次
+            if self._opening_begin_time == begin_time:
+                return
+            self._opening_task.cancel()
+        self._opened.clear()
+        self._prepoll.clear()
+        self._opening_begin_time = begin_time
+        self._opening_task = self._loop.create_task(self._opening(begin_time, *options))
+
+    async def _opening(self, begin_time: float, connections: int, sync_lead: float,
+                       refresh_lead: float, prewarm_lead: float) -> None:
+        """依次校准时钟、刷新会话、预建连接，然后在开始时刻放行所有课程"""
+        begin_text = datetime.datetime.fromtimestamp(begin_time, SERVER_TZ).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            self.log(f"选课将于 {begin_text} 开始，届时自动提交")
+
+            await self._sleep_until(begin_time - sync_lead)
+            try:
+                # 离开始已经很近时缩短校准，给后面的步骤留出时间
+                timeout = max(0.0, begin_time - self.clock.now() - prewarm_lead - 1)
+                offset = await self._loop.run_in_executor(
+                    self._executor, self.clock.sync, self.course_client.server_date, 8, 0.005, timeout
+                )
+                self.log(f"服务器时间比本机{'快' if offset >= 0 else '慢'} {abs(offset) * 1000:.0f} ms"
+                         f"（误差 ±{self.clock.error * 1000:.0f} ms）")
+            except Exception as e:
+                self.log(f"校准服务器时间失败，使用本机时间：{str(e)}", level="error")
+
+            await self._sleep_until(begin_time - refresh_lead)
+            if refresh_lead > 0 and begin_time - self.clock.now() > prewarm_lead + 1:
+                client, message = await self._loop.run_in_executor(self._executor, self.sessions.refresh)
+                self.log(message if client is not None else f"开始前刷新登录状态失败：{message}")
+
+            await self._sleep_until(begin_time - prewarm_lead)
+            client = self.course_client
+            # 提前查好教学班ID前缀，开始时第一次提交不必先查询
+            for course_type in set().union(*self._course_types.values()):
+                try:
+                    await self._loop.run_in_executor(self._executor, client.get_prefix, course_type)
+                except Exception as e:
+                    self.log(f"查询{course_type}课程前缀失败：{str(e)}", level="error")
+            if connections > 0:
+                count = await self._loop.run_in_executor(
+                    self._executor, client.session.prewarm, client.online_users_url(), connections
+                )
+                self.log(f"已预先建立 {count} 个连接")
+
+            self._prepoll.set()
+            await self._sleep_until(begin_time, precise=True)
+            self.log("选课开始")
+        finally:
+            # 被新的定时替换时由新任务负责放行
+            if self._opening_task is asyncio.current_task():
+                self._prepoll.set()
+                self._opened.set()
+
+    async def _sleep_until(self, server_time: float, precise: bool = False) -> None:
+        """
+        等待到服务器时间 server_time
+        precise 为True时，最后几毫秒让出事件循环后反复检查，而不依赖定时器精度
+        """
+        deadline = self.clock.to_monotonic(server_time)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not precise or remaining > 0.005:
+                await asyncio.sleep(remaining - 0.005 if precise else remaining)
+            else:
+                await asyncio.sleep(0)
+
+    def _cancel_course(self, key: Any) -> None:
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def _emit(self, kind: str, data: Any = None) -> None:
+        self.events.put((kind, data))
+
+    def log(self, message: str, **fields) -> None:
+        """输出一条日志，可在任意线程中调用"""
+        self.sink.emit(message, **fields)
+
+    def _session_expired(self, generation: int) -> None:
+        """某个请求发现登录失效，若该会话已被替换则忽略"""
+        if generation != self.sessions.generation or not self.is_logged_in:
+            return
+        self.is_logged_in = False
+        self._expired_generation = generation
+        JOURNAL.record("logged_out")
+        self.log("登录已失效，准备重新登录")
+
+    async def _call(self, key: Any, func: Callable, *args) -> Any:
+        """在线程池中执行一次阻塞请求，受调度器速率和在途请求数限制"""
+        queued_at = time.monotonic()
+        await self.scheduler.acquire(key)
+        async with self._semaphore:
+            started_at = time.monotonic()
+            stats = self.stats.setdefault(key, {"attempts": 0, "wait": 0.0})
+            stats["attempts"] += 1
+            stats["wait"] += started_at - queued_at
+            try:
+                result = await self._loop.run_in_executor(self._executor, func, *args)
+            except Exception:
+                self.scheduler.record(time.monotonic() - started_at, ok=False)
+                raise
+            self.scheduler.record(time.monotonic() - started_at)
+            return result
+
+    async def _ensure_login(self) -> bool:
+        """重新登录，同一时间只会有一个登录过程"""
+        async with self._relogin_lock:
+            if self.is_logged_in:
+                return True
+
+            # 会话已被后台刷新替换，不必再登录
+            if self.sessions.generation != self._expired_generation:
+                self.is_logged_in = True
+                JOURNAL.record("logged_in")
+                return True
+
+            if time.monotonic() - self._last_relogin_attempt < self.relogin_interval:
+                return False
+            self._last_relogin_attempt = time.monotonic()
+
+            try:
+                client, message = await self._loop.run_in_executor(
+                    self._executor, self.sessions.refresh, self._expired_generation
+                )
+            except Exception as e:
+                client, message = None, f"重新登录错误：{str(e)}"
+
+            if client is None:
+                self.log(f"{message}，{self.relogin_interval}秒后重试")
+                return False
+
+            self.is_logged_in = True
+            JOURNAL.record("logged_in")
+            self.log(message)
+            return True
+
+    async def _attempt(self, key: Any, target: SelectionTarget) -> Optional[SelectResult]:
+        """提交一次选课请求，返回分类后的结果；因登录失效或请求出错未能得到结果时返回None"""
+        # 如果未登录，尝试重新登录
+        if not self.is_logged_in:
+            if not await self._ensure_login():
+                await asyncio.sleep(0.5)
+                return None
+
+        course_code = target.class_code
+        client, generation = self.sessions.current()
+        try:
+            result = await self._call(key, client.select_target, target)
+        except Exception as e:
+            self.log(f"发生错误：{str(e)}", level="error", course=course_code)
+            return None
+
+        if result.outcome == SESSION_EXPIRED:
+            self._session_expired(generation)
+            return None
+
+        self.log(f"课程 {course_code}：{result.msg}", course=course_code, result=result.msg, outcome=result.outcome)
+        return result
+
+    async def _swap(self, key: Any, group: TargetGroup, target: SelectionTarget) -> Optional[SelectResult]:
+        """
+        换课：退掉 group.replaces 后立即选 target，没选上时选回，返回选课请求的结果；
+        退课没有成功、或因登录失效等原因没有得到选课结果时返回None
+        退课、选课和选回在同一个请求线程中连续发出，复用等待空位时一直在用的连接
+        """
+        if not self.is_logged_in:
+            if not await self._ensure_login():
+                await asyncio.sleep(0.5)
+                return None
+
+        drop, restore = group.replaces, group.restore
+        client, generation = self.sessions.current()
+        try:
+            # 退课和选课各占一份调度额度，一起申请，两个请求之间不再排队
+            await self.scheduler.acquire(key)
+            swap = await self._call(key, client.swap_targets, drop, target, restore)
+        except Exception as e:
+            group.drop_uncertain = True
+            self.log(f"换课出错：{str(e)}", level="error", course=target.class_code)
+            return None
+
+        dropped, added, restored = swap.dropped, swap.added, swap.restored
+        if dropped.outcome == SESSION_EXPIRED:
+            self._session_expired(generation)
+            return None
+
+        if added is None:
+            self.log(f"退掉课程 {drop.class_code} 失败：{dropped.msg}", course=drop.class_code, outcome=dropped.outcome)
+            if dropped.outcome == NOT_HELD:
+                # 并未持有要退掉的教学班，改为直接选课；之前退课出错时可能已经退掉，把它也作为备选
+                group.replaces = None
+                self._record_drop(drop.class_code)
+                if group.drop_uncertain:
+                    group.targets.append(restore)
+                self.log(f"未持有课程 {drop.class_code}，改为直接选课", course=target.class_code)
+            elif dropped.terminal:
+                # 服务器拒绝退课（如不允许退选），直接选课会同时持有两个教学班，停止该组
+                codes = "、".join(target.class_code for target in group.targets)
+                self.log(f"课程 {drop.class_code} 无法退课，停止换成 {codes}",
+                         level="error", course=drop.class_code, outcome=dropped.outcome)
+                self._emit("result", (key, drop.class_code, dropped.outcome))
+                group.targets = []
+            elif dropped.outcome == NOT_OPEN:
+                await self._wait_for_opening()
+            else:
+                await asyncio.sleep(self.not_open_interval)
+            return None
+
+        self.log(f"课程 {target.class_code}：{added.msg}", course=target.class_code,
+                 result=added.msg, outcome=added.outcome)
+        if added.success:
+            self.log(f"换课成功：已退掉 {drop.class_code}，选上 {target.class_code}，"
+                     f"用时 {swap.elapsed * 1000:.0f} ms", course=target.class_code)
+        elif restored is not None and restored.success:
+            group.drop_uncertain = False
+            self.log(f"未能换成 {target.class_code}，已选回 {drop.class_code}，"
+                     f"期间 {swap.elapsed * 1000:.0f} ms 未持有", course=drop.class_code)
+        else:
+            # 原教学班没能选回，之后同时抢换成的教学班和原教学班
+            self.log(f"未能换成 {target.class_code}，选回 {drop.class_code} 也失败："
+                     f"{restored.msg if restored is not None else ''}，继续抢这两个教学班",
+                     level="error", course=drop.class_code)
+            group.replaces = None
+            group.wait_for_seat = False
+            group.targets.append(restore)
+            self._record_drop(drop.class_code)
+
+        if SESSION_EXPIRED in (added.outcome, restored.outcome if restored is not None else None):
+            self._session_expired(generation)
+            return None
+        return added
+
+    async def _wait_for_opening(self) -> None:
+        """
+        服务器提示不在选课时间内：批次尚未开始则转为定时开抢；
+        刚过预计的开始时刻（时钟误差所致）时稍等即重试，否则暂停一段时间再试
+        """
+        begin_time = self._opening_begin_time
+        if self.schedule_opening(self._opening_config):
+            # 让定时开抢先关闭闸门
+            await asyncio.sleep(0)
+        elif begin_time is not None and self.clock.now() - begin_time < self.not_open_interval:
+            await asyncio.sleep(0.05)
+        else:
+            await asyncio.sleep(self.not_open_interval)
+
+    def _sync_timetable(self) -> List[Slot]:
+        """已选课程列表更新后同步课表，返回有变化的上课时间"""
+        courses = self.course_client.selected_courses
+        if courses is self._timetable_source:
+            return []
+        self._timetable_source = courses
+        return self.timetable.update({
+            course["class_code"]: parse_schedule(course["teaching_place"]) for course in courses
+        })
+
+    async def _check_conflicts(self, key: Any, group: TargetGroup) -> None:
+        """
+        首次提交前查询组内各教学班的上课时间，标记与已选课程冲突的教学班
+        还没有已选课程时不必为此多发请求，之后查询容量时记录下的上课时间仍会用于检查
+        """
+        changed = self._sync_timetable()
+        if changed:
+            self._recheck_groups(changed)
+        if not len(self.timetable):
+            return
+
+        for target in list(group.targets):
+            client = self.course_client
+            if target.class_code in client.teaching_places:
+                continue
+            try:
+                await self._call(key, client.get_teaching_place, target.class_code, target.course_type)
+            except Exception as e:
+                # 查不到时不做本地检查，交给服务器判断
+                self.log(f"查询课程 {target.class_code} 上课时间失败，跳过时间冲突检查：{str(e)}",
+                         course=target.class_code)
+        self._recheck(key, group)
+
+    def _slots(self, group: TargetGroup, course_code: str) -> Tuple[Slot, ...]:
+        """教学班的上课时间，尚未查到时为空"""
+        slots = group.slots.get(course_code)
+        if slots is None:
+            place = self.course_client.teaching_places.get(course_code)
+            if place is None:
+                return ()
+            slots = group.slots[course_code] = parse_schedule(place)
+        return slots
+
+    def _recheck(self, key: Any, group: TargetGroup, changed: Optional[List[Slot]] = None) -> None:
+        """
+        重新检查组内教学班与课表是否冲突
+
+        Args:
+            changed: 课表中有变化的上课时间，给出时只检查与之重叠的教学班
+        """
+        for target in group.targets:
+            course_code = target.class_code
+            slots = self._slots(group, course_code)
+            if not slots:
+                continue
+            if changed is not None and not any(slot.overlaps(other) for slot in slots for other in changed):
+                continue
+
+            # 换课时要退掉的教学班不算冲突
+            ignore = (course_code, group.replaces.class_code) if group.replaces is not None else (course_code,)
+            conflicts = self.timetable.conflicts(slots, ignore=ignore)
+            if conflicts:
+                if course_code not in group.blocked:
+                    self.log(f"课程 {course_code} 与已选课程 {'、'.join(conflicts)} 时间冲突，暂不提交",
+                             level="error", course=course_code, outcome=CONFLICT)
+                    self._emit("result", (key, course_code, CONFLICT))
+                group.blocked[course_code] = conflicts
+            elif group.blocked.pop(course_code, None) is not None:
+                self.log(f"课程 {course_code} 不再与已选课程冲突，恢复抢课", course=course_code)
+                group.unblocked.set()
+                self._watchers_changed.set()
+
+    def _recheck_groups(self, changed: List[Slot]) -> None:
+        for key, group in self._groups.items():
+            self._recheck(key, group, changed)
+
+    def _record_selection(self, course_code: str, slots: Tuple[Slot, ...], dropped: Optional[str] = None) -> None:
+        """选上一门课程（换课时同时退掉 dropped）后更新课表，并重新检查受影响的其余教学班"""
+        changed = list(self.timetable.remove(dropped)) if dropped else []
+        self.timetable.add(course_code, slots)
+        changed.extend(slots)
+        if changed:
+            self._recheck_groups(changed)
+
+    def _record_drop(self, course_code: str) -> None:
+        changed = self.timetable.remove(course_code)
+        if changed:
+            self._recheck_groups(list(changed))
+
+    async def _group_loop(self, key: Any, group: TargetGroup) -> None:
+        """抢课循环，每组一个，每次提交组内优先级最高的可选教学班"""
+        self._groups[key] = group
+        if group.wait_for_seat:
+            self._seat_watchers[key] = group
+            self._watchers_changed.set()
+            if self._capacity_task is None or self._capacity_task.done():
+                self._capacity_task = self._loop.create_task(self._capacity_loop())
+
+        try:
+            await self._check_conflicts(key, group)
+            retry = None
+            while group.targets:
+                # 组内教学班都与已选课程冲突时，等到已选课程变化后再继续
+                if not group.candidates():
+                    codes = "、".join(target.class_code for target in group.targets)
+                    self.log(f"课程 {codes} 均与已选课程时间冲突，等待已选课程变化")
+                    group.unblocked.clear()
+                    await group.unblocked.wait()
+                    continue
+                if retry is not None and retry.class_code in group.blocked:
+                    retry = None
+
+                # 等待模式下只有出现空位才提交，因登录失效等原因没能提交的除外
+                if group.wait_for_seat and retry is None:
+                    while not group.available.difference(group.blocked):
+                        await group.seat.wait()
+                        group.seat.clear()
+
+                if not self._opened.is_set():
+                    await self._opened.wait()
+
+                target = retry or group.pick()
+                course_code = target.class_code
+                if group.replaces is not None:
+                    result = await self._swap(key, group, target)
+                else:
+                    result = await self._attempt(key, target)
+                # 没有得到结果、或失败原因与空位无关时，不必等待下一个空位，直接重试同一个教学班
+                if result is None or result.outcome in (NOT_OPEN, RATE_LIMITED):
+                    retry = target
+                else:
+                    retry = None
+                if result is None:
+                    continue
+
+                self._emit("result", (key, course_code, result.outcome))
+                if result.success:
+                    dropped = group.replaces.class_code if group.replaces is not None else None
+                    self._record_selection(course_code, self._slots(group, course_code), dropped)
+                    self._emit("selected", key)
+                    if len(group.targets) > 1:
+                        self.log(f"已选上 {course_code}，放弃同组其余备选")
+                    break
+                if result.outcome == CLOSED:
+                    # 批次已经结束，组内其余教学班也不可能选上
+                    self.log(f"选课已结束（{result.msg}），停止抢课", level="error",
+                             course=course_code, outcome=result.outcome)
+                    break
+                if result.terminal:
+                    group.remove(course_code)
+                    self.log(f"课程 {course_code} 无法选上（{result.msg}），"
+                             f"{'改抢同组其余备选' if group.targets else '停止抢课'}",
+                             level="error", course=course_code, outcome=result.outcome)
+                    continue
+                group.available.discard(course_code)
+                if result.outcome == NOT_OPEN:
+                    await self._wait_for_opening()
+                elif result.outcome == RATE_LIMITED:
+                    # 按请求失败处理，调度器会把总速率减半
+                    self.scheduler.record(self.scheduler.latency or 0.0, ok=False)
+        finally:
+            if self._groups.get(key) is group:
+                del self._groups[key]
+            if self._seat_watchers.get(key) is group:
+                del self._seat_watchers[key]
+                self._watchers_changed.set()
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+                self._course_types.pop(key, None)
+            self._emit("finished", key)
+
+    async def _capacity_loop(self) -> None:
+        """
+        轮询等待空位的教学班容量，同一门课程下的多个教学班只查询一次
+        定时开抢前不查询：开始前只在预建连接后查询一轮，之后等到开始再继续
+        """
+        # 已在开始前查询过一轮的开始时刻
+        prepolled = None
+        while self._seat_watchers:
+            if not self._opened.is_set():
+                if prepolled == self._opening_begin_time:
+                    await self._opened.wait()
+                    continue
+                await self._prepoll.wait()
+                prepolled = self._opening_begin_time
+
+            if not self.is_logged_in:
+                if not await self._ensure_login():
+                    await asyncio.sleep(0.5)
+                    continue
+
+            courses: Dict[Tuple[str, str], list] = {}
+            for group in self._seat_watchers.values():
+                for target in group.candidates():
+                    course = (CourseSelection.course_number(target.class_code), target.course_type)
+                    courses.setdefault(course, []).append((target.class_code, group))
+            # 所有教学班都因时间冲突暂停时没有需要查询的，等到有教学班恢复或抢课组变化
+            if not courses:
+                self._watchers_changed.clear()
+                await self._watchers_changed.wait()
+                continue
+
+            for (course_number, course_type), watchers in courses.items():
+                client, generation = self.sessions.current()
+                try:
+                    classes = await self._call(
+                        ("capacity", course_number),
+                        client.get_class_capacity, course_number, course_type
+                    )
+                except Exception as e:
+                    if "登录" in str(e):
+                        self._session_expired(generation)
+                        break
+                    self.log(f"查询课程 {course_number} 容量失败：{str(e)}")
+                    continue
+
+                for course_code, group in watchers:
+                    info = classes.get(course_code)
+                    if info is None or info['full']:
+                        group.available.discard(course_code)
+                        continue
+                    if course_code not in group.available:
+                        self.log(f"课程 {course_code} 出现空位（{info['selected']}/{info['capacity']}），提交选课")
+                        group.available.add(course_code)
+                    group.seat.set()
+
+    async def _online_users_loop(self) -> None:
+        """
+        定时更新在线人数，整个引擎只有这一个轮询
+        在线人数只用于展示，优先级最低：服务器变慢（调度器已经降速或延迟超过目标值）或请求失败时跳过本轮，
+        并把轮询间隔加倍，到达上限后按上限间隔继续轮询，恢复正常后回到配置的间隔；
+        人数没有变化时不产生事件，界面只会收到最新的人数
+        """
+        interval = self.online_interval
+        while True:
+            await asyncio.sleep(interval)
+            if not self.is_logged_in:
+                continue
+
+            scheduler = self.scheduler
+            pressure = scheduler.rate < scheduler.max_rps or (scheduler.latency or 0) > scheduler.target_latency
+            if pressure and interval < self.online_max_interval:
+                interval = min(interval * 2, self.online_max_interval)
+                continue
+
+            try:
+                online_users = await self._call(
+                    "online_users", self.course_client.get_person, self.online_timeout
+                )
+            except Exception:
+                interval = min(interval * 2, self.online_max_interval)
+                continue
+
+            if not pressure:
+                interval = self.online_interval
+            if online_users != self.online_users:
+                self.online_users = online_users
+                self._emit("online_users", online_users)
@@ -0,0 +1,267 @@
+import os
+import re
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from journal import JOURNAL, Journal
+from metrics import METRICS, MetricsRegistry
+from policy import DEFAULT_POLICY, CircuitOpenError, RequestPolicy, is_failure
+
+# 统一身份认证和选课系统的地址，可通过环境变量指向本地的模拟服务器
+ORG_URL = os.environ.get("XJTU_ORG_URL", "https://org.xjtu.edu.cn").rstrip("/")
+XKFW_URL = os.environ.get("XJTU_XKFW_URL", "https://xkfw.xjtu.edu.cn").rstrip("/")
+ORG_DOMAIN = urlsplit(ORG_URL).hostname
+
+# 当前线程上一次请求中新建连接的耗时
+_timing = threading.local()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started_at = time.perf_counter()
+        super().connect()
+        _timing.connect = getattr(_timing, "connect", 0.0) + time.perf_counter() - started_at
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started_at = time.perf_counter()
+        super().connect()
+        _timing.connect = getattr(_timing, "connect", 0.0) + time.perf_counter() - started_at
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """记录新建连接（含TLS握手）耗时的连接池"""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool
+        }
+
+
+def endpoint_name(url: str) -> str:
+    """由URL得到接口名称，去掉公共前缀，学号等路径参数替换为占位符"""
+    return _endpoint_for_path(urlsplit(url).path)
+
+
+@lru_cache(maxsize=256)
+def _endpoint_for_path(path: str) -> str:
+    for prefix in ("/xsxkapp/sys/xsxkapp/", "/openplatform/"):
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+            break
+    return re.sub(r"^student/(?!register\.do)[^/]+\.do$", "student/{code}.do", path.lstrip("/")) or "/"
+
+
+class _ThreadSafeCookieJar(RequestsCookieJar):
+    """
+    线程安全的Cookie jar
+    CookieJar写入时会加锁，但遍历时不加锁，多个线程同时发请求时可能在合并Cookie时报错，
+    这里遍历前先在锁内做一次快照
+
+    每次写入或清空后 version 加一，预先构造的请求据此判断其中的Cookie是否已过时
+    """
+    version = 0
+
+    def __iter__(self):
+        with self._cookies_lock:
+            return iter(list(super().__iter__()))
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        super().set_cookie(cookie, *args, **kwargs)
+        self.version += 1
+
+    def clear(self, domain=None, path=None, name=None):
+        super().clear(domain, path, name)
+        self.version += 1
+
+
+class HttpClient:
+    """
+    共享的HTTP会话
+    Login创建后交给CourseSelection复用，所有请求共用同一个Cookie jar和keep-alive连接池，
+    避免每次请求都重新进行TCP+TLS握手
+
+    所有请求都按 policy 中对应接口的策略限定超时和总时限、失败时退避重试，并经过所属主机的熔断器
+    """
+    def __init__(self, pool_size: int = 16, adapter: Optional[HTTPAdapter] = None,
+                 metrics: MetricsRegistry = METRICS, policy: RequestPolicy = DEFAULT_POLICY,
+                 journal: Journal = JOURNAL):
+        """
+        Args:
+            pool_size: 每个主机保持的最大连接数
+            adapter: 共用的连接池，为空时新建
+            metrics: 记录请求指标的位置
+            policy: 超时、重试和熔断策略
+            journal: 逐条记录请求的日志
+        """
+        self.session = requests.Session()
+        self.session.cookies = _ThreadSafeCookieJar()
+        self.metrics = metrics
+        self.journal = journal
+        self.policy = policy
+
+        self.adapter = adapter or _TimedHTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def fork(self) -> "HttpClient":
+        """
+        创建一个共用连接池、但Cookie jar独立的新会话
+        用于在后台重新登录时不影响正在使用旧Cookie的请求，同时保留已建立的连接
+        """
+        return HttpClient(adapter=self.adapter, metrics=self.metrics, policy=self.policy, journal=self.journal)
+
+    @property
+    def cookies(self) -> RequestsCookieJar:
+        return self.session.cookies
+
+    def set_cookie(self, name: str, value: str, domain: str) -> None:
+        self.session.cookies.set(name, value, domain=domain, path="/")
+
+    def clear_cookies(self) -> None:
+        self.session.cookies.clear()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        按接口策略发送请求，并按接口记录建立连接、首字节和总耗时
+        传入 timeout 时代替策略中的单次超时时间
+        """
+        return self._call(endpoint_name(url), url, self.session.request, (method, url), kwargs)
+
+    @property
+    def cookie_version(self) -> int:
+        return self.session.cookies.version
+
+    def prepare(self, method: str, url: str, **kwargs) -> Tuple[requests.PreparedRequest, dict]:
+        """
+        预先构造请求，供 send 反复发送
+        请求头、请求体和当时的Cookie都在此时确定，代理等环境设置也只合并一次
+
+        Returns:
+            (构造好的请求, 发送参数)
+        """
+        prepared = self.session.prepare_request(requests.Request(method, url, **kwargs))
+        settings = self.session.merge_environment_settings(prepared.url, {}, None, None, None)
+        return prepared, settings
+
+    def send(self, prepared: requests.PreparedRequest, endpoint: str, **kwargs) -> requests.Response:
+        """发送 prepare 构造的请求，跳过每次构造请求的开销，同样按接口策略发送并记录请求指标"""
+        return self._call(endpoint, prepared.url, self.session.send, (prepared,), kwargs)
+
+    def _call(self, endpoint: str, url: str, func: Callable[..., requests.Response],
+              args: tuple, kwargs: dict) -> requests.Response:
+        policy = self.policy.for_endpoint(endpoint)
+        breaker = self.policy.breaker(urlsplit(url).netloc)
+        timeout = kwargs.pop("timeout", None) or policy.timeout
+        deadline = time.monotonic() + max(policy.deadline, timeout)
+        response = error = None
+
+        for attempt in range(policy.retries + 1):
+            if attempt:
+                delay = self.policy.backoff(policy, attempt - 1)
+                if time.monotonic() + delay >= deadline:
+                    break
+                if response is not None:
+                    response.close()
+                time.sleep(delay)
+
+            if not breaker.acquire(deadline):
+                self.metrics.record(endpoint, 0, "circuit_open", 0.0)
+                self.journal.record("http", e=endpoint, l=0.0, s=0, o="circuit_open")
+                raise CircuitOpenError(f"服务器连续请求失败，已暂停访问 {urlsplit(url).netloc}")
+
+            # 熔断器可能一直等到了总时限附近，仍至少给这次请求一点时间
+            remaining = max(deadline - time.monotonic(), 0.01)
+            try:
+                response = self._timed(endpoint, func, *args, timeout=min(timeout, remaining), **kwargs)
+                error = None
+            except (requests.Timeout, requests.ConnectionError) as e:
+                response, error = None, e
+            except Exception:
+                breaker.release()
+                raise
+
+            breaker.record(not is_failure(response))
+            if not is_failure(response):
+                return response
+
+        if error is not None:
+            raise error
+        # 重试后仍是5xx：抛出 HTTPError，调用方不会把错误页面当作正常响应去解析
+        response.raise_for_status()
+        return response
+
+    def _timed(self, endpoint: str, func: Callable[..., requests.Response], *args, **kwargs) -> requests.Response:
+        _timing.connect = 0.0
+        started_at = time.perf_counter()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            outcome = "timeout" if isinstance(e, requests.Timeout) else "error"
+            elapsed = time.perf_counter() - started_at
+            self.metrics.record(endpoint, 0, outcome, elapsed, connect=_timing.connect or None)
+            self.journal.record("http", e=endpoint, l=elapsed, s=0, o=outcome)
+            raise
+
+        elapsed = time.perf_counter() - started_at
+        outcome = "ok" if response.status_code < 400 else "http_error"
+        self.metrics.record(
+            endpoint,
+            response.status_code,
+            outcome,
+            elapsed,
+            ttfb=response.elapsed.total_seconds(),
+            connect=_timing.connect or None
+        )
+        self.journal.record("http", e=endpoint, l=elapsed, s=response.status_code, o=outcome)
+        return response
+
+    def prewarm(self, url: str, connections: int = 4, timeout: float = 5) -> int:
+        """
+        同时向 url 发送多个请求，预先建立连接并放回连接池，之后的请求不必再握手
+
+        Returns:
+            成功的请求数
+        """
+        barrier = threading.Barrier(connections)
+
+        def warm() -> bool:
+            try:
+                barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                self.get(url, timeout=timeout).close()
+                return True
+            except requests.RequestException:
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="prewarm") as executor:
+            return sum(executor.map(lambda _: warm(), range(connections)))
+
+    def close(self) -> None:
+        self.session.close()
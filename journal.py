@@ -0,0 +1,263 @@
+"""
+追加写入的请求日志及其离线分析
+
+    python journal.py logs/journal.jsonl
+    python journal.py logs/journal.jsonl --json
+"""
+import argparse
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_PATH = os.path.join("logs", "journal.jsonl")
+
+# 视为选上的结果分类，与 course_selection 中的 SELECTED / ALREADY_SELECTED 一致
+SUCCESS_OUTCOMES = ("selected", "already_selected")
+
+
+class Journal:
+    """
+    追加写入的请求日志
+    每条记录一行紧凑的JSON，t 为 time.monotonic() 时间戳，k 为记录类型：
+    - start：一次运行开始，wall 为对应的本机时间，之后各条记录据此换算为本机时间
+    - http：一次HTTP请求，e 接口、l 耗时、s 状态码、o 结果
+    - select：一次选课请求，c 课程代码、o 分类后的结果、l 耗时
+    - drop：一次退课请求，字段同 select
+    - swap：一次换课，d 退掉的课程代码、c 换成的课程代码、o 选课（退课失败时为退课）的结果、
+      r 选回原课程的结果、l 两门课程都不持有的时间
+    - login：一次登录，r 原因（bootstrap 启动时 / refresh 重新登录）、o 结果、l 耗时
+    - logged_out / logged_in：选课引擎发现登录失效 / 恢复登录
+
+    record 只把记录放入队列，序列化和写文件在单独的线程中进行，不拖慢发请求的线程；
+    未调用 open 时不记录任何内容
+    """
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._queue: Optional[queue.SimpleQueue] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, path: str = DEFAULT_PATH) -> None:
+        """开始记录，追加到 path 末尾"""
+        if self._queue is not None:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._write_loop, args=(open(path, "a", encoding="utf-8"), self._queue),
+            name="journal", daemon=True
+        )
+        self._thread.start()
+        self.record("start", wall=time.time(), pid=os.getpid())
+
+    def record(self, kind: str, **fields) -> None:
+        """写入一条记录，可在任意线程中调用"""
+        if self._queue is not None:
+            self._queue.put((time.monotonic(), kind, fields))
+
+    def close(self) -> None:
+        """停止记录，已记录的内容会先全部落盘"""
+        if self._queue is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._queue = self._thread = None
+
+    @staticmethod
+    def _write_loop(f, entries: queue.SimpleQueue) -> None:
+        with f:
+            while True:
+                batch = [entries.get()]
+                while True:
+                    try:
+                        batch.append(entries.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines = []
+                for entry in batch:
+                    if entry is None:
+                        f.write("".join(lines))
+                        return
+                    timestamp, kind, fields = entry
+                    data = {"t": round(timestamp, 6), "k": kind}
+                    for key, value in fields.items():
+                        data[key] = round(value, 6) if isinstance(value, float) else value
+                    lines.append(json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n")
+                # 每批写完立即落盘，程序异常退出时最多丢失最后一批
+                f.write("".join(lines))
+                f.flush()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """最近秩法计算分位数，values 须已排序"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(q * len(values) + 0.5) - 1))]
+
+
+def analyze(lines: Iterable[str]) -> dict:
+    """
+    逐行读取日志并汇总：各接口的延迟分位数、每门课程的尝试次数和结果、选上的时间线、登录和登录失效的时间
+
+    Args:
+        lines: 日志文件的各行，可直接传入打开的文件
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    courses: Dict[str, dict] = {}
+    timeline = []
+    logins = {"count": 0, "failed": 0, "latency": []}
+    logged_out = {"count": 0, "seconds": 0.0}
+    runs = 0
+    # 当前这次运行的 monotonic 基准，以及登录失效的开始时刻
+    base = None
+    first_attempt = None
+    out_since = None
+    last = None
+
+    def to_wall(t: float) -> Optional[float]:
+        return base[1] + t - base[0] if base is not None else None
+
+    def close_run() -> None:
+        nonlocal out_since
+        if out_since is not None and last is not None:
+            logged_out["seconds"] += last - out_since
+            out_since = None
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+            t, kind = entry["t"], entry["k"]
+        except (ValueError, KeyError, TypeError):
+            continue
+
+        if kind == "start":
+            close_run()
+            runs += 1
+            base = (t, entry.get("wall", 0.0))
+            first_attempt = last = None
+            continue
+        last = t
+
+        if kind == "http":
+            endpoint = entry.get("e", "")
+            latencies[endpoint].append(entry.get("l", 0.0))
+            if entry.get("o") != "ok":
+                errors[endpoint] += 1
+        elif kind == "select":
+            course = courses.setdefault(entry.get("c", ""), {"attempts": 0, "outcomes": Counter()})
+            course["attempts"] += 1
+            course["outcomes"][entry.get("o", "")] += 1
+            if first_attempt is None:
+                first_attempt = t
+            if entry.get("o") in SUCCESS_OUTCOMES and "selected_at" not in course:
+                course["selected_at"] = to_wall(t)
+                timeline.append({
+                    "course": entry.get("c", ""),
+                    "time": to_wall(t),
+                    "after": t - first_attempt,
+                    "attempts": course["attempts"]
+                })
+        elif kind == "login":
+            logins["count"] += 1
+            logins["latency"].append(entry.get("l", 0.0))
+            if entry.get("o") != "ok":
+                logins["failed"] += 1
+        elif kind == "logged_out":
+            if out_since is None:
+                out_since = t
+                logged_out["count"] += 1
+        elif kind == "logged_in":
+            if out_since is not None:
+                logged_out["seconds"] += t - out_since
+                out_since = None
+    close_run()
+
+    endpoints = {}
+    for endpoint, values in sorted(latencies.items()):
+        values.sort()
+        endpoints[endpoint] = {
+            "count": len(values),
+            "errors": errors[endpoint],
+            "p50": _percentile(values, 0.5),
+            "p90": _percentile(values, 0.9),
+            "p99": _percentile(values, 0.99),
+            "max": values[-1]
+        }
+    login_latency = logins.pop("latency")
+    logins["mean"] = sum(login_latency) / len(login_latency) if login_latency else 0.0
+    return {
+        "runs": runs,
+        "endpoints": endpoints,
+        "courses": {code: {**course, "outcomes": dict(course["outcomes"])} for code, course in sorted(courses.items())},
+        "timeline": timeline,
+        "logins": logins,
+        "logged_out": logged_out
+    }
+
+
+def format_report(report: dict) -> str:
+    def clock(timestamp: Optional[float]) -> str:
+        if timestamp is None:
+            return "-"
+        return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    lines = [f"共 {report['runs']} 次运行", "", "接口延迟（毫秒）："]
+    lines.append(f"  {'接口':<32}{'请求数':>8}{'失败':>6}{'p50':>9}{'p90':>9}{'p99':>9}{'最大':>9}")
+    for endpoint, row in report["endpoints"].items():
+        lines.append(
+            f"  {endpoint:<32}{row['count']:>8}{row['errors']:>6}"
+            + "".join(f"{row[key] * 1000:>9.1f}" for key in ("p50", "p90", "p99", "max"))
+        )
+
+    lines += ["", "各课程的选课请求："]
+    for code, course in report["courses"].items():
+        outcomes = "，".join(f"{outcome} {count}" for outcome, count in course["outcomes"].items())
+        lines.append(f"  {code}：{course['attempts']} 次（{outcomes}）")
+
+    lines += ["", "选上时间线："]
+    for item in report["timeline"]:
+        lines.append(
+            f"  {clock(item['time'])}  {item['course']}  开始后 {item['after']:.3f} 秒，第 {item['attempts']} 次请求"
+        )
+    if not report["timeline"]:
+        lines.append("  无")
+
+    logins, logged_out = report["logins"], report["logged_out"]
+    lines += [
+        "",
+        f"登录 {logins['count']} 次，失败 {logins['failed']} 次，平均耗时 {logins['mean']:.2f} 秒",
+        f"登录失效 {logged_out['count']} 次，共 {logged_out['seconds']:.1f} 秒"
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="分析请求日志：接口延迟、各课程请求次数、选上时间线和登录失效时间")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH, help="日志文件路径")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.path, "r", encoding="utf-8") as f:
+            report = analyze(f)
+    except OSError as e:
+        print(f"读取日志失败：{str(e)}")
+        return 1
+    print(json.dumps(report, ensure_ascii=False, indent=2) if args.json else format_report(report))
+    return 0
+
+
+# 全局日志，所有HTTP会话和选课客户端默认记录到这里，调用 open 后才开始写文件
+JOURNAL = Journal()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
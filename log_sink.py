@@ -0,0 +1,94 @@
+import datetime
+import json
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import List, Optional
+
+DEFAULT_PATH = os.path.join("logs", "selection.log")
+
+
+class LogSink:
+    """
+    线程安全的日志管道
+    任意线程调用 emit 写入结构化事件，不直接操作界面：
+    - 界面线程定时批量取出事件，一次性插入文本框，并只保留最近 max_lines 行
+    - 全部历史以JSON行的形式写入按大小滚动的日志文件，写文件在单独的线程中进行
+    """
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_PATH,
+        max_lines: int = 1000,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 5
+    ):
+        """
+        Args:
+            path: 日志文件路径，为空时不写文件
+            max_lines: 界面中保留的最大行数
+            max_bytes: 单个日志文件的最大字节数
+            backup_count: 保留的历史日志文件数
+        """
+        self.max_lines = max_lines
+        self._events: "queue.Queue[dict]" = queue.Queue()
+        self._file_queue: Optional[queue.SimpleQueue] = None
+        self._listener: Optional[QueueListener] = None
+
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            self._file_queue = queue.SimpleQueue()
+            self._listener = QueueListener(self._file_queue, handler)
+            self._listener.start()
+
+    def emit(self, message: str, level: str = "info", **fields) -> None:
+        """写入一条日志，fields 为附加的结构化字段"""
+        event = {"time": time.time(), "level": level, "message": message}
+        event.update(fields)
+        self._events.put(event)
+        if self._file_queue is not None:
+            self._file_queue.put(logging.makeLogRecord({"msg": json.dumps(event, ensure_ascii=False)}))
+
+    def drain(self, max_items: int = 500) -> List[dict]:
+        """取出最多 max_items 条尚未显示的事件"""
+        events = []
+        while len(events) < max_items:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    @staticmethod
+    def format(event: dict) -> str:
+        current_time = datetime.datetime.fromtimestamp(event["time"]).strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{current_time}] {event['message']}"
+
+    def attach(self, widget, interval: int = 100, batch_size: int = 500) -> None:
+        """
+        在界面线程中定时把事件批量写入文本框
+
+        Args:
+            widget: tk.Text 文本框
+            interval: 刷新间隔（毫秒）
+            batch_size: 每次最多写入的事件数
+        """
+        def flush():
+            events = self.drain(batch_size)
+            if events:
+                widget.insert("end", "".join(f"{self.format(event)}\n" for event in events))
+                excess = int(widget.index("end-1c").split(".")[0]) - self.max_lines
+                if excess > 0:
+                    widget.delete("1.0", f"{excess + 1}.0")
+                widget.see("end")
+            widget.after(interval, flush)
+
+        widget.after(interval, flush)
+
+    def close(self) -> None:
+        """停止写文件线程，已写入的日志会先全部落盘"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
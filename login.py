@@ -1,17 +1,28 @@
-import requests
 import json
 import time
 from typing import Optional, Tuple
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import pad
 import base64
+from http_client import HttpClient, ORG_DOMAIN, ORG_URL, XKFW_URL
+from session_store import SessionStore
 
 class Login:
-    def __init__(self):
-        self.cookies = {}
+    def __init__(self, session: Optional[HttpClient] = None):
+        """
+        Args:
+            session: 共享的HTTP会话，为空时新建一个；重新登录时传入旧会话可复用已建立的连接
+        """
+        self.session = session or HttpClient()
         self.ticket = ""
         self.name = ""
         self.token = ""
+        # 实际完成登录的时间戳；恢复保存的登录状态时为当初登录并保存的时间
+        self.logged_in_at: Optional[float] = None
+
+    @property
+    def cookies(self) -> dict:
+        return self.session.cookies.get_dict()
 
     def change_psd(self, password: str) -> str:
         key = b"0725@pwdorgopenp"
@@ -21,9 +32,11 @@ class Login:
         encrypted_data = cipher.encrypt(padded_data)
         return base64.b64encode(encrypted_data).decode('utf-8')
 
-    def login_process(self, username: str, password: str) -> Tuple[bool, str]:
+    def login_process(self, username: str, password: str,
+                      store: Optional[SessionStore] = None) -> Tuple[bool, str]:
         """
         完整的登录流程
+        传入store时先尝试恢复保存的登录状态，恢复失败才完整登录，登录成功后保存新的登录状态
         返回: (是否成功, 错误信息)
         """
         if not password:
@@ -32,6 +45,9 @@ class Login:
         if not username:
             return False, "请输入账号"
 
+        if store is not None and self.restore_session(store, username, password):
+            return True, "已恢复登录状态"
+
         try:
             login_response = self.login(username, password)
             login_data = json.loads(login_response)
@@ -61,11 +77,68 @@ class Login:
             if not self.token:
                 return False, "获取token失败"
 
+            self.logged_in_at = time.time()
+            if store is not None:
+                self.save_session(store, username, password)
+
             return True, "登录成功"
 
         except Exception as e:
             return False, f"登录过程出错：{str(e)}"
 
+    def save_session(self, store: SessionStore, username: str, password: str) -> None:
+        """保存当前的登录状态"""
+        cookies = [
+            {"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path}
+            for cookie in self.session.cookies
+        ]
+        store.save(username, password, {
+            "cookies": cookies,
+            "token": self.token,
+            "ticket": self.ticket,
+            "name": self.name
+        })
+
+    def restore_session(self, store: SessionStore, username: str, password: str) -> bool:
+        """恢复保存的登录状态，并用一次请求确认其仍然有效"""
+        state = store.load(username, password)
+        if not state:
+            return False
+
+        self.session.clear_cookies()
+        for cookie in state.get("cookies", []):
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie["domain"], path=cookie["path"])
+        self.token = state.get("token", "")
+        self.ticket = state.get("ticket", "")
+        self.name = state.get("name", "")
+
+        if self.validate_session(username):
+            self.logged_in_at = state.get("saved_at") or time.time()
+            return True
+
+        store.clear()
+        self.session.clear_cookies()
+        self.token = self.ticket = self.name = ""
+        return False
+
+    def validate_session(self, username: str) -> bool:
+        """请求学生信息接口，检查当前的token和cookies是否仍然有效"""
+        headers = {
+            "X-Requested-With": "XMLHttpRequest",
+            "token": self.token,
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
+        }
+        try:
+            timestamp = int(time.time() * 1000)
+            response = self.session.get(
+                f"{XKFW_URL}/xsxkapp/sys/xsxkapp/student/{username}.do?timestamp={timestamp}",
+                headers=headers,
+                timeout=3
+            )
+            return response.json().get("code") == "1"
+        except Exception:
+            return False
+
     def login(self, username: str, password: str) -> str:
         encrypted_pwd = self.change_psd(password)
         login_data = {
@@ -77,32 +150,21 @@ class Login:
         headers = {
             "Content-Type": "application/json;charset=utf-8"
         }
-        self.cookies = {
+        self.session.clear_cookies()
+        for name, value in {
             "cur_appId_": "DP8bMYJppEA=",
             "state": "xjdCas",
             "sid_code": "workbench_login_jcaptcha_D5EEE031FFC3F40CEE6041558ED6BBF8"
-        }
+        }.items():
+            self.session.set_cookie(name, value, ORG_DOMAIN)
 
-        for attempt in range(5):
-            try:
-                response = requests.post(
-                    "https://org.xjtu.edu.cn/openplatform/g/admin/login",
-                    json=login_data,
-                    headers=headers,
-                    cookies=self.cookies,
-                    timeout=1.5
-                )
-                self.cookies.update(response.cookies.get_dict())
-                return response.text
-            except requests.Timeout:
-                print(f"请求超时，尝试重试 ({attempt + 1}/5)")
-                if attempt == 4:  # 最后一次尝试
-                    raise Exception("请求多次超时，请检查网络连接")
-            except Exception as e:
-                print(f"发生错误：{str(e)}，尝试重试 ({attempt + 1}/5)")
-                if attempt == 4:  # 最后一次尝试
-                    raise
-                continue
+        # 超时重试由 HttpClient 的请求策略统一处理
+        response = self.session.post(
+            f"{ORG_URL}/openplatform/g/admin/login",
+            json=login_data,
+            headers=headers
+        )
+        return response.text
     
     def get_ticket(self, username: str, usertoken: str) -> str:
         """
@@ -110,24 +172,12 @@ class Login:
         """
         current_timestamp = str(int(time.time() * 1000))
 
-        self.cookies.update({
-            "open_Platform_User": usertoken,
-            "memberId": "860000"
-        })
+        self.session.set_cookie("open_Platform_User", usertoken, ORG_DOMAIN)
+        self.session.set_cookie("memberId", "860000", ORG_DOMAIN)
         
-        cookies_str = '; '.join([f"{k}={v}" for k, v in self.cookies.items()])
+        full_url = f"{ORG_URL}/openplatform/oauth/auth/getRedirectUrl?userType=1&personNo={username}&_={current_timestamp}"
         
-        full_url = f"https://org.xjtu.edu.cn/openplatform/oauth/auth/getRedirectUrl?userType=1&personNo={username}&_={current_timestamp}"
-        headers = {
-            "Cookie": cookies_str
-        }
-        
-        response = requests.get(
-            full_url,
-            headers=headers
-        )
-        
-        self.cookies.update(response.cookies.get_dict())
+        response = self.session.get(full_url)
         
         return response.text
     
@@ -136,32 +186,28 @@ class Login:
         获取token
         """
         headers = {
-            "Referer": f"http://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
+            "Referer": f"{XKFW_URL}/xsxkapp/sys/xsxkapp/*default/index.do?ticket={self.ticket}"
         }
         
-        response = requests.get(
-            f"http://xkfw.xjtu.edu.cn/xsxkapp/sys/xsxkapp/student/register.do",
+        response = self.session.get(
+            f"{XKFW_URL}/xsxkapp/sys/xsxkapp/student/register.do",
             params={"number": username},
-            cookies=self.cookies,
             headers=headers
         )
         
-        self.cookies.update(response.cookies.get_dict())
-        
         response_json = response.json()
         self.name = response_json.get("data", {}).get("name")
         self.token = response_json.get("data", {}).get("token", "")
         
         return response.text
 
-    def visit_redirect_url(self, url: str, max_retries: int = 5, timeout: int = 2) -> None:
+    def visit_redirect_url(self, url: str) -> None:
         """
         访问重定向URL获取新的cookies和编码转换后的响应
+        新的cookies直接写入共享会话的Cookie jar；超时重试由 HttpClient 的请求策略统一处理
         
         Args:
             url: 重定向URL
-            max_retries: 最大重试次数
-            timeout: 超时时间（秒）
         """
         headers = {
             "Connection": "keep-alive",
@@ -175,51 +221,13 @@ class Login:
             "Sec-Fetch-Mode": "navigate",
             "Sec-Fetch-User": "?1",
             "Sec-Fetch-Dest": "document",
-            "Referer": "https://org.xjtu.edu.cn/",
+            "Referer": f"{ORG_URL}/",
             "Accept-Encoding": "gzip, deflate, br, zstd",
             "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6"
         }
         
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(
-                    url,
-                    headers=headers,
-                    allow_redirects=False,
-                    cookies=self.cookies,
-                    timeout=timeout
-                )
-                
-                first_cookies = response.cookies.get_dict()
-                
-                if 'Location' in response.headers:
-                    redirect_location = response.headers['Location']
-                    if 'ticket=' in redirect_location:
-                        self.ticket = redirect_location.split('ticket=')[-1]
-                        try:
-                            second_response = requests.get(
-                                redirect_location,
-                                headers=headers,
-                                cookies=first_cookies,
-                                timeout=timeout
-                            )
-                            
-                            self.cookies = first_cookies.copy()
-                            self.cookies.update(second_response.cookies.get_dict())
-                            return  # 成功完成，退出函数
-                            
-                        except requests.Timeout:
-                            print(f"第二次请求超时，尝试重试 ({attempt + 1}/{max_retries})")
-                            continue
-                            
-                return
-            except requests.Timeout:
-                print(f"请求超时，尝试重试 ({attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise Exception("请求多次超时，请检查网络连接")
-                    
-            except Exception as e:
-                print(f"发生错误：{str(e)}，尝试重试 ({attempt + 1}/{max_retries})")
-                if attempt == max_retries - 1:
-                    raise
-                
\ No newline at end of file
+        response = self.session.get(url, headers=headers, allow_redirects=False)
+        redirect_location = response.headers.get('Location', '')
+        if 'ticket=' in redirect_location:
+            self.ticket = redirect_location.split('ticket=')[-1]
+            self.session.get(redirect_location, headers=headers)
@@ -0,0 +1,159 @@
+import json
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# 直方图的桶上界（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+PHASES = ("connect", "ttfb", "total")
+
+
+class Histogram:
+    """固定桶的延迟直方图"""
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数，落在最后一个桶时返回前一个桶的上界"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bound in enumerate(BUCKETS):
+            cumulative += self.counts[i]
+            if cumulative >= target:
+                return bound if bound != float("inf") else BUCKETS[-2]
+        return BUCKETS[-2]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_bound(bound): count for bound, count in zip(BUCKETS, self.counts)}
+        }
+
+
+class MetricsRegistry:
+    """
+    按接口统计请求指标
+    每个接口记录建立连接耗时、首字节耗时和总耗时三个直方图，以及按状态码和结果分类的请求数；
+    建立连接耗时只在实际新建连接时记录，其次数即为新建连接数
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._requests: Counter = Counter()
+
+    def record(self, endpoint: str, status: int, outcome: str, total: float,
+               ttfb: Optional[float] = None, connect: Optional[float] = None) -> None:
+        """
+        记录一次请求
+
+        Args:
+            endpoint: 接口名称
+            status: HTTP状态码，未收到响应时为0
+            outcome: 结果，ok、http_error、timeout、error，或熔断期间未发出的 circuit_open
+            total: 总耗时（秒）
+            ttfb: 首字节耗时（秒）
+            connect: 建立连接耗时（秒），复用连接时为None
+        """
+        with self._lock:
+            self._requests[(endpoint, status, outcome)] += 1
+            for phase, value in (("total", total), ("ttfb", ttfb), ("connect", connect)):
+                if value is not None:
+                    self._histograms.setdefault((endpoint, phase), Histogram()).observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def summary(self) -> List[dict]:
+        """每个接口的汇总，用于界面展示"""
+        with self._lock:
+            endpoints = sorted({endpoint for endpoint, _ in self._histograms})
+            rows = []
+            for endpoint in endpoints:
+                total = self._histograms.get((endpoint, "total"), Histogram())
+                ttfb = self._histograms.get((endpoint, "ttfb"), Histogram())
+                connect = self._histograms.get((endpoint, "connect"), Histogram())
+                errors = sum(
+                    count for (name, _, outcome), count in self._requests.items()
+                    if name == endpoint and outcome != "ok"
+                )
+                rows.append({
+                    "endpoint": endpoint,
+                    "count": total.count,
+                    "errors": errors,
+                    "connects": connect.count,
+                    "mean": total.sum / total.count if total.count else 0.0,
+                    "p50": total.quantile(0.5),
+                    "p95": total.quantile(0.95),
+                    "ttfb_p50": ttfb.quantile(0.5)
+                })
+            return rows
+
+    def to_json(self) -> str:
+        """导出JSON格式的快照"""
+        with self._lock:
+            data = {"endpoints": {}}
+            for (endpoint, phase), histogram in sorted(self._histograms.items()):
+                data["endpoints"].setdefault(endpoint, {"requests": [], "latency": {}})
+                data["endpoints"][endpoint]["latency"][phase] = histogram.to_dict()
+            for (endpoint, status, outcome), count in sorted(self._requests.items()):
+                data["endpoints"].setdefault(endpoint, {"requests": [], "latency": {}})
+                data["endpoints"][endpoint]["requests"].append(
+                    {"status": status, "outcome": outcome, "count": count}
+                )
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """导出Prometheus文本格式的快照"""
+        lines = [
+            "# HELP xjtu_request_duration_seconds HTTP request latency by endpoint and phase.",
+            "# TYPE xjtu_request_duration_seconds histogram"
+        ]
+        with self._lock:
+            for (endpoint, phase), histogram in sorted(self._histograms.items()):
+                labels = f'endpoint="{endpoint}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'xjtu_request_duration_seconds_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}'
+                    )
+                lines.append(f"xjtu_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"xjtu_request_duration_seconds_count{{{labels}}} {histogram.count}")
+
+            lines.append("# HELP xjtu_requests_total HTTP requests by endpoint, status and outcome.")
+            lines.append("# TYPE xjtu_requests_total counter")
+            for (endpoint, status, outcome), count in sorted(self._requests.items()):
+                lines.append(
+                    f'xjtu_requests_total{{endpoint="{endpoint}",status="{status}",outcome="{outcome}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """按扩展名导出快照，.json 为JSON，其余为Prometheus文本格式"""
+        content = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else str(bound)
+
+
+# 全局指标，所有HTTP会话默认记录到这里
+METRICS = MetricsRegistry()
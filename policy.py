@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+import requests
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class EndpointPolicy(NamedTuple):
+    """
+    单个接口的超时与重试策略
+
+    Attributes:
+        timeout: 单次请求的超时时间（秒）
+        deadline: 包括重试和等待在内的总时限（秒）
+        retries: 超时、连接失败或服务器返回5xx时最多重试的次数
+        backoff: 第一次重试前的退避时间上限（秒），之后每次翻倍
+        max_backoff: 退避时间上限的最大值（秒）
+    """
+    timeout: float = 5
+    deadline: float = 15
+    retries: int = 2
+    backoff: float = 0.2
+    max_backoff: float = 2
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """服务器持续失败、熔断器断开期间在时限内无法发出请求"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+    连续失败达到阈值后断开，断开期间的请求先暂停等待，不再给已经过载的服务器增加压力；
+    断开时间结束后只放行一个试探请求，成功则恢复，失败则再次断开
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 1):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后断开
+            reset_timeout: 每次断开的时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_until = 0.0
+        self._probing = False
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: float) -> bool:
+        """
+        等待直到允许发出请求
+
+        Args:
+            deadline: 最晚等到的 time.monotonic() 时刻
+
+        Returns:
+            是否允许发出请求；在 deadline 之前仍处于断开状态时返回 False
+        """
+        # 绝大多数时候处于闭合状态，不必加锁
+        if self.state == CLOSED:
+            return True
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self.state == CLOSED:
+                    return True
+                if self.state == OPEN and now >= self._opened_until:
+                    self.state = HALF_OPEN
+                if self.state == HALF_OPEN and not self._probing:
+                    self._probing = True
+                    return True
+
+                # 断开中等到断开结束，试探中等到试探请求的结果
+                wake_at = self._opened_until if self.state == OPEN else deadline
+                if now >= deadline:
+                    return False
+                self._condition.wait(min(wake_at, deadline) - now)
+
+    def release(self) -> None:
+        """请求因与服务器无关的原因失败时调用，不改变状态，只让出试探机会"""
+        with self._condition:
+            self._probing = False
+            self._condition.notify_all()
+
+    def record(self, success: bool) -> None:
+        """记录一次请求的结果"""
+        if success and self.state == CLOSED and not self.failures:
+            return
+        with self._condition:
+            if success:
+                self.failures = 0
+                self.state = CLOSED
+            else:
+                self.failures += 1
+                if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                    self.state = OPEN
+                    self._opened_until = time.monotonic() + self.reset_timeout
+            self._probing = False
+            self._condition.notify_all()
+
+
+# 各接口的策略，键为 http_client.endpoint_name 得到的接口名称
+ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    # 登录相关请求在网络不好时容易超时，多重试几次
+    "g/admin/login": EndpointPolicy(timeout=1.5, deadline=15, retries=4),
+    "oauth/auth/getRedirectUrl": EndpointPolicy(timeout=2, deadline=10, retries=4),
+    "student/register.do": EndpointPolicy(timeout=3, deadline=10, retries=3),
+    "*default/index.do": EndpointPolicy(timeout=2, deadline=10, retries=4),
+    "student/{code}.do": EndpointPolicy(timeout=3, deadline=6, retries=1),
+    # 选课请求由选课引擎按节奏重试，这里不重复重试
+    "elective/volunteer.do": EndpointPolicy(timeout=3, deadline=5, retries=0),
+    # 换课时退课后紧接着选课，重试会拉长两门课程都不持有的时间，由选课引擎决定是否重来
+    "elective/deleteVolunteer.do": EndpointPolicy(timeout=3, deadline=5, retries=0),
+    # 在线人数用于轮询和校准时钟，过期的结果没有意义
+    "publicinfo/onlineUsers.do": EndpointPolicy(timeout=5, deadline=5, retries=0),
+    "elective/recommendedCourse.do": EndpointPolicy(timeout=10, deadline=30, retries=2),
+    "elective/courseResult.do": EndpointPolicy(timeout=5, deadline=15, retries=2),
+    "*default/grablessons.do": EndpointPolicy(timeout=5, deadline=15, retries=2),
+}
+
+
+class RequestPolicy:
+    """
+    统一的超时、重试和熔断策略
+    每个接口有各自的单次超时、总时限和重试次数，重试前按指数退避并加随机抖动，
+    避免大量客户端同时重试；每个主机一个熔断器，服务器持续失败时暂停该主机的所有请求
+    """
+    def __init__(self, endpoints: Optional[Dict[str, EndpointPolicy]] = None,
+                 default: EndpointPolicy = EndpointPolicy(),
+                 failure_threshold: int = 5, reset_timeout: float = 1):
+        """
+        Args:
+            endpoints: 各接口的策略，为空时使用 ENDPOINT_POLICIES
+            default: 未单独配置的接口使用的策略
+            failure_threshold: 熔断器连续失败多少次后断开
+            reset_timeout: 熔断器每次断开的时间（秒）
+        """
+        self.endpoints = ENDPOINT_POLICIES if endpoints is None else endpoints
+        self.default = default
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_endpoint(self, endpoint: str) -> EndpointPolicy:
+        return self.endpoints.get(endpoint, self.default)
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    host, CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                )
+        return breaker
+
+    @staticmethod
+    def backoff(policy: EndpointPolicy, attempt: int) -> float:
+        """第 attempt 次重试前的等待时间（full jitter）"""
+        return random.uniform(0, min(policy.max_backoff, policy.backoff * 2 ** attempt))
+
+
+def is_failure(response: Optional[requests.Response]) -> bool:
+    """服务器端的失败：没有收到响应或返回5xx；4xx和业务错误不计入熔断"""
+    return response is None or response.status_code >= 500
+
+
+# 全局策略，所有HTTP会话默认共用，同一主机的熔断状态也因此共享
+DEFAULT_POLICY = RequestPolicy()
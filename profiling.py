@@ -0,0 +1,263 @@
+import datetime
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from config import ProfilingConfig
+
+# 叶子帧为这些函数时，线程在等待锁、队列、事件或网络数据，而不是在执行代码
+IDLE_FRAMES = frozenset({
+    ("socket.py", "readinto"),
+    ("ssl.py", "read"),
+    ("ssl.py", "recv_into"),
+    ("wait.py", "do_poll"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("base_events.py", "_run_once"),
+    ("thread.py", "_worker"),
+    ("__init__.py", "mainloop"),
+})
+
+
+class Profiler:
+    """
+    可选的性能分析，全部在一个后台线程中进行，结果写入 directory 下的文件：
+    - cpu：每隔 interval 秒采样 window 秒所有线程的调用栈，写出各线程最耗时的函数（cpu-*.txt）
+      和可直接生成火焰图的折叠栈（cpu-*.folded）
+    - memory：用 tracemalloc 跟踪内存分配，每隔 interval 秒写出分配最多的代码行及其相对上次的增长（memory-*.txt）
+    - threads：每隔 interval 秒把各线程消耗的CPU时间追加到 threads.csv（仅支持Linux）
+
+    cProfile 只能跟踪调用 enable 的那一个线程，而选课引擎的请求分散在线程池中，
+    因此CPU分析采用对 sys._current_frames() 定时采样的方式，能同时覆盖界面线程和所有工作线程；
+    这是按墙钟时间的调用栈采样，阻塞在 time.sleep 等C函数中的线程会记在调用它的Python函数上，
+    因此报告中同时给出各线程在采样期间实际消耗的CPU时间（仅Linux）
+    """
+    def __init__(self, config: ProfilingConfig, log=print):
+        """
+        Args:
+            config: 分析设置
+            log: 输出提示信息的函数
+        """
+        self.config = config
+        self.log = log
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._memory_snapshot: Optional[tracemalloc.Snapshot] = None
+        # 是否由本分析器开启了 tracemalloc，停止时只关闭自己开启的
+        self._started_tracing = False
+        self._thread_times: Dict[int, float] = {}
+        self._accounted_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.cpu or self.config.memory or self.config.threads
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+        os.makedirs(self.config.directory, exist_ok=True)
+        if self.config.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.config.threads:
+            self._account_threads(write=False)
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        self.log(f"性能分析已开启，结果写入 {os.path.abspath(self.config.directory)}")
+
+    def stop(self) -> None:
+        """停止分析，并写出最后一次内存快照和线程CPU时间"""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        if self.config.memory:
+            self._snapshot_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+        if self.config.threads:
+            self._account_threads()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            started_at = time.monotonic()
+            if self.config.cpu:
+                self._sample_cpu(self.config.window)
+            if self._stopped.wait(max(0.0, self.config.interval - (time.monotonic() - started_at))):
+                break
+            if self.config.memory:
+                self._snapshot_memory()
+            if self.config.threads:
+                self._account_threads()
+
+    def _path(self, kind: str, extension: str) -> str:
+        name = f"{kind}-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+        return os.path.join(self.config.directory, name)
+
+    def _sample_cpu(self, window: float) -> None:
+        """在 window 秒内定时采样所有线程的调用栈"""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        cpu_before = thread_cpu_times()
+        started_at = time.monotonic()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + window
+        while time.monotonic() < deadline and not self._stopped.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((os.path.basename(code.co_filename), code.co_name, code.co_firstlineno))
+                    frame = frame.f_back
+                if ident not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stacks[(names.get(ident, str(ident)),) + tuple(reversed(stack))] += 1
+            samples += 1
+            time.sleep(self.config.sample_interval)
+
+        if samples:
+            cpu = self._cpu_usage(cpu_before, time.monotonic() - started_at)
+            self._write_cpu_report(stacks, samples, window, cpu)
+
+    @staticmethod
+    def _cpu_usage(before: Optional[Dict[int, Tuple[str, float]]], elapsed: float) -> Dict[str, float]:
+        """采样期间各线程（按线程名）消耗的CPU时间占墙钟时间的比例，不支持的系统返回空字典"""
+        after = thread_cpu_times()
+        if before is None or after is None or elapsed <= 0:
+            return {}
+        usage: Dict[str, float] = defaultdict(float)
+        for tid, (name, cpu) in after.items():
+            usage[name] += (cpu - before.get(tid, (name, 0.0))[1]) / elapsed
+        return usage
+
+    def _write_cpu_report(self, stacks: Counter, samples: int, window: float, cpu: Dict[str, float]) -> None:
+        def label(frame: Tuple[str, str, int]) -> str:
+            return f"{frame[1]} ({frame[0]}:{frame[2]})"
+
+        # 每个线程：总采样数、等待中的采样数、各函数作为叶子（自身）和出现在栈中（累计）的采样数
+        threads: Dict[str, dict] = defaultdict(lambda: {"samples": 0, "idle": 0, "self": Counter(), "total": Counter()})
+        for stack, count in stacks.items():
+            thread, frames = stack[0], stack[1:]
+            entry = threads[thread]
+            entry["samples"] += count
+            if not frames or frames[-1][:2] in IDLE_FRAMES:
+                entry["idle"] += count
+                continue
+            entry["self"][frames[-1]] += count
+            for frame in set(frames):
+                entry["total"][frame] += count
+
+        top = self.config.top
+        lines = [f"采样 {window:.1f} 秒，共 {samples} 轮，间隔 {self.config.sample_interval * 1000:.1f} 毫秒",
+                 "按墙钟时间采样调用栈：每个线程的百分比为该线程在采样中处于对应函数内的比例，",
+                 "等待锁、队列或网络数据的采样不计入函数统计，但阻塞在 time.sleep 等C函数中的时间仍记在调用它的函数上，",
+                 "CPU 为该线程在采样期间实际消耗的CPU时间占比（仅Linux），可据此区分真正耗CPU的线程", ""]
+        for thread, entry in sorted(threads.items(), key=lambda item: item[1]["idle"] - item[1]["samples"]):
+            busy = entry["samples"] - entry["idle"]
+            usage = f"，CPU {cpu[thread]:.1%}" if thread in cpu else ""
+            lines.append(f"线程 {thread}：位于Python代码 {busy / entry['samples']:.1%}（{busy}/{entry['samples']}）{usage}")
+            if not busy:
+                lines.append("")
+                continue
+            lines.append("  自身：")
+            for frame, count in entry["self"].most_common(top):
+                lines.append(f"    {count / entry['samples']:>7.1%}  {label(frame)}")
+            lines.append("  累计：")
+            for frame, count in entry["total"].most_common(top):
+                lines.append(f"    {count / entry['samples']:>7.1%}  {label(frame)}")
+            lines.append("")
+
+        path = self._path("cpu", "txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        with open(path[:-len("txt")] + "folded", "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(";".join([stack[0]] + [label(frame) for frame in stack[1:]]) + f" {count}\n")
+
+    def _snapshot_memory(self) -> None:
+        """写出分配内存最多的代码行，以及相对上一次快照增长最多的代码行"""
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        top = self.config.top
+        lines = [f"当前跟踪的内存 {current / 1024:.1f} KiB，峰值 {peak / 1024:.1f} KiB", "", "分配最多的代码行："]
+        for stat in snapshot.statistics("lineno")[:top]:
+            lines.append(f"  {stat.size / 1024:>10.1f} KiB  {stat.count:>8} 块  {stat.traceback}")
+        if self._memory_snapshot is not None:
+            lines += ["", "相对上一次快照增长最多的代码行："]
+            for stat in snapshot.compare_to(self._memory_snapshot, "lineno")[:top]:
+                lines.append(f"  {stat.size_diff / 1024:>+10.1f} KiB  {stat.count_diff:>+8} 块  {stat.traceback}")
+        self._memory_snapshot = snapshot
+
+        with open(self._path("memory", "txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    def _account_threads(self, write: bool = True) -> None:
+        """把各线程自上次以来消耗的CPU时间追加到 threads.csv"""
+        times = thread_cpu_times()
+        if times is None:
+            if write:
+                self.log("当前系统不支持按线程统计CPU时间，已跳过")
+                self.config = self.config._replace(threads=False)
+            return
+
+        now = time.monotonic()
+        elapsed = now - self._accounted_at
+        self._accounted_at = now
+        previous, self._thread_times = self._thread_times, {tid: cpu for tid, (_, cpu) in times.items()}
+        if not write or elapsed <= 0:
+            return
+
+        path = os.path.join(self.config.directory, "threads.csv")
+        new_file = not os.path.exists(path)
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(path, "a", encoding="utf-8") as f:
+            if new_file:
+                f.write("time,thread,tid,cpu_seconds,cpu_percent\n")
+            for tid, (name, cpu) in sorted(times.items(), key=lambda item: item[1][0]):
+                delta = cpu - previous.get(tid, 0.0)
+                f.write(f"{timestamp},{name},{tid},{delta:.3f},{delta / elapsed * 100:.1f}\n")
+
+
+def thread_cpu_times() -> Optional[Dict[int, Tuple[str, float]]]:
+    """
+    当前进程各线程累计消耗的CPU时间（用户态+内核态，秒），键为系统线程ID
+    线程名优先取 threading 中的名称，不是由Python创建的线程（如Tk内部线程）取系统中的名称；
+    读取 /proc/self/task，不支持的系统返回None
+    """
+    try:
+        tids = os.listdir("/proc/self/task")
+        ticks = os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+    names = {thread.native_id: thread.name for thread in threading.enumerate()}
+    times = {}
+    for tid in tids:
+        try:
+            with open(f"/proc/self/task/{tid}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 第2项是括号中的线程名，可能包含空格，从最后一个右括号之后开始按空格切分
+        comm = stat[stat.index("(") + 1:stat.rindex(")")]
+        fields: List[str] = stat[stat.rindex(")") + 2:].split()
+        # 第14、15项为 utime 和 stime，切分后下标为11、12
+        cpu = (int(fields[11]) + int(fields[12])) / ticks
+        times[int(tid)] = (names.get(int(tid), comm), cpu)
+    return times
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+from config import PacingConfig
+
+
+class RequestScheduler:
+    """
+    全局请求调度器
+    所有发往选课系统的请求都要先从这里领取令牌：
+    - 令牌桶限制总的每秒请求数，课程再多总请求量也不会超过预算
+    - 有多个任务同时等待时按轮转顺序发放令牌，各课程平分预算
+    - 根据请求延迟和失败情况自动调整速率：出错或超时立即减半，
+      延迟超过目标值逐步降低，恢复正常后再慢慢回升到上限
+    只能在同一个事件循环中使用
+    """
+    def __init__(
+        self,
+        rps: float = 5.0,
+        burst: float = 2.0,
+        min_rps: float = 0.5,
+        target_latency: float = 1.0
+    ):
+        """
+        Args:
+            rps: 总的每秒请求数上限
+            burst: 令牌桶容量，允许的瞬时突发请求数
+            min_rps: 自动降速时的下限
+            target_latency: 目标请求延迟（秒），平均延迟超过该值时降速
+        """
+        self.max_rps = rps
+        self.min_rps = min(min_rps, rps)
+        self.burst = max(burst, 1.0)
+        self.target_latency = target_latency
+
+        self.rate = rps
+        self.latency: Optional[float] = None
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._waiters: "OrderedDict[Any, Deque[asyncio.Future]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, pacing: PacingConfig) -> "RequestScheduler":
+        """根据配置文件中的 pacing 部分创建调度器"""
+        return cls(
+            rps=pacing.rps,
+            burst=pacing.burst,
+            min_rps=pacing.min_rps,
+            target_latency=pacing.target_latency
+        )
+
+    def configure(self, pacing: PacingConfig) -> None:
+        """运行中修改速率设置，当前速率和令牌数收缩到新的范围内，正在等待的请求不受影响"""
+        self.max_rps = pacing.rps
+        self.min_rps = min(pacing.min_rps, pacing.rps)
+        self.burst = max(pacing.burst, 1.0)
+        self.target_latency = pacing.target_latency
+        self.rate = min(max(self.rate, self.min_rps), self.max_rps)
+        self._tokens = min(self._tokens, self.burst)
+
+    async def acquire(self, key: Any) -> None:
+        """等待轮到 key 发送下一个请求"""
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = loop.create_task(self._dispatch())
+
+        future = loop.create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        self._wakeup.set()
+        await future
+
+    def record(self, latency: float, ok: bool = True) -> None:
+        """
+        记录一次请求的结果，用于调整速率
+
+        Args:
+            latency: 请求耗时（秒）
+            ok: 请求是否正常完成，出错或超时为False
+        """
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = 0.8 * self.latency + 0.2 * latency
+
+        if not ok:
+            self.rate = max(self.min_rps, self.rate * 0.5)
+        elif self.latency > self.target_latency:
+            self.rate = max(self.min_rps, self.rate * 0.9)
+        else:
+            self.rate = min(self.max_rps, self.rate + self.max_rps * 0.05)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前的调度状态"""
+        active = len(self._waiters)
+        return {
+            "rate": self.rate,
+            "latency": self.latency,
+            "waiting": active,
+            "per_key_rate": self.rate / active if active else self.rate
+        }
+
+    def _next_key(self) -> Any:
+        """按轮转顺序取下一个有等待请求的 key，顺便清理已取消的等待"""
+        for key in list(self._waiters):
+            waiters = self._waiters[key]
+            while waiters and waiters[0].done():
+                waiters.popleft()
+            if waiters:
+                return key
+            del self._waiters[key]
+        return None
+
+    def _take_token(self) -> float:
+        """取一个令牌，返回还需要等待的秒数，0表示已取到"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def _dispatch(self) -> None:
+        while True:
+            key = self._next_key()
+            if key is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._take_token()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+
+            waiters = self._waiters.pop(key)
+            waiters.popleft().set_result(None)
+            # 被服务过的 key 排到队尾
+            if waiters:
+                self._waiters[key] = waiters
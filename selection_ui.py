@@ -0,0 +1,521 @@
+import tkinter as tk
+from tkinter import messagebox, filedialog
+import ttkbootstrap as ttk
+from config import ConfigWatcher, diff_courses
+from engine import SelectionEngine, TargetGroup
+from catalog import CourseCatalog
+from log_sink import LogSink
+from journal import JOURNAL
+from metrics import METRICS
+from profiling import Profiler
+import threading
+import queue
+import re
+
+TYPE_NAMES = {
+    "major": "主修课程",
+    "elective": "选修课程",
+    "physical": "体育课程",
+    "program": "方案内课程"
+}
+
+OUTCOME_NAMES = {
+    "selected": "已选上",
+    "already_selected": "已选上",
+    "full": "已满",
+    "not_open": "未开始",
+    "closed": "已结束",
+    "rate_limited": "请求过快",
+    "conflict": "时间冲突",
+    "invalid": "不可选",
+    "limit_exceeded": "超出上限",
+    "unknown": "未知结果"
+}
+
+class CourseSelectionUI:
+    def __init__(self, root, sessions, user_name, config):
+        self.window = ttk.Toplevel(root)
+        self.window.title("选课系统")
+        self.window.geometry("560x1000")
+        
+        # 添加窗口关闭事件处理
+        self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        self.user_name = user_name
+        
+        self.config = config
+        
+        self.root = root
+        
+        # 所有课程共用一个选课引擎，请求速率由全局调度器统一控制
+        self.sessions = sessions
+        self.log_sink = LogSink()
+        self.engine = SelectionEngine.from_config(sessions, self.config, sink=self.log_sink)
+        self.engine.start()
+        
+        # 后台主动刷新登录状态
+        self.sessions.log = self.engine.log
+        self.sessions.start()
+        
+        # 批次尚未开始时定时开抢，开始前点击"开始抢课"的课程会等到开始时刻才提交
+        self.engine.schedule_opening(self.config.opening)
+        
+        # 配置文件修改后，课程列表和速率设置立即生效，不需要重新登录
+        self.config_updates = queue.Queue()
+        self.config_watcher = ConfigWatcher(
+            self.config, on_error=lambda message: self.engine.log(message, level="error")
+        )
+        self.config_watcher.subscribe(lambda old, new: self.config_updates.put((old, new)))
+        self.config_watcher.start()
+        
+        # 按配置开启性能分析，覆盖界面线程和选课引擎的所有线程
+        self.profiler = Profiler(self.config.profiling, log=self.engine.log)
+        self.profiler.start()
+        
+        self.main_frame = ttk.Frame(self.window, padding="20")
+        self.main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        welcome_label = ttk.Label(
+            self.main_frame,
+            text=f"欢迎，{user_name}",
+            font=("Microsoft YaHei UI", 16, "bold")
+        )
+        welcome_label.pack(pady=20)
+        
+        self.catalog = CourseCatalog()
+        self.create_search_frame().pack(fill=tk.X, pady=10)
+        
+        # 抢课列表：iid -> {'codes': 按优先级排列的教学班, 'type': 课程类型, 'watch': 是否等待空位,
+        #                  'replaces': 换课时要退掉的已选教学班}
+        self.targets = {}
+        # 正在抢课的行 -> 本次抢课任务在引擎中的键 (iid, 序号)；同一行停止后再开始时序号不同，
+        # 上一次任务结束前发出的事件据此忽略
+        self.running = {}
+        # 已选上的抢课任务的键
+        self.selected_targets = set()
+        self.next_target_id = 0
+        self.next_run_id = 0
+        # 来自配置文件的课程组 -> 对应的行
+        self.config_targets = {}
+        self.create_target_frame().pack(fill=tk.BOTH, expand=True, pady=10)
+        for course in self.config.courses:
+            self.config_targets[course] = self.add_target(
+                list(course.codes), course.course_type, course.watch, course.replaces
+            )
+        
+        self.info_text = tk.Text(
+            self.main_frame,
+            height=10,
+            wrap=tk.WORD,
+            font=("Microsoft YaHei UI", 10)
+        )
+        self.info_text.pack(fill=tk.BOTH, pady=10, expand=True)
+        
+        scrollbar = ttk.Scrollbar(self.info_text)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.info_text.config(yscrollcommand=scrollbar.set)
+        scrollbar.config(command=self.info_text.yview)
+        
+        # 日志由界面线程定时批量写入
+        self.log_sink.attach(self.info_text)
+        
+        # 处理选课引擎产生的事件
+        self.window.after(100, self.process_engine_events)
+        
+        # 后台增量同步课程目录
+        self.start_catalog_sync()
+    
+    def create_search_frame(self):
+        """创建课程搜索框架，在本地课程目录中搜索，双击结果填入课程代码输入框"""
+        frame = ttk.LabelFrame(self.main_frame, text="课程搜索", padding="10")
+        
+        input_frame = ttk.Frame(frame)
+        input_frame.pack(fill=tk.X, pady=5)
+        
+        self.search_entry = ttk.Entry(input_frame, width=20)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.search_catalog())
+        
+        ttk.Button(
+            input_frame,
+            text="搜索",
+            style="primary.TButton",
+            command=self.search_catalog
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            input_frame,
+            text="同步目录",
+            style="secondary.TButton",
+            command=lambda: self.start_catalog_sync(force=True)
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            input_frame,
+            text="请求指标",
+            style="secondary.TButton",
+            command=self.show_metrics
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.search_results = []
+        self.search_listbox = tk.Listbox(frame, height=5, font=("Microsoft YaHei UI", 9))
+        self.search_listbox.pack(fill=tk.X, pady=5)
+        self.search_listbox.bind("<Double-Button-1>", lambda event: self.use_search_result())
+        
+        return frame
+    
+    def search_catalog(self):
+        """在本地课程目录中搜索"""
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        
+        self.search_results = self.catalog.search(self.engine.course_client.batch_code, query)
+        self.search_listbox.delete(0, tk.END)
+        for row in self.search_results:
+            self.search_listbox.insert(
+                tk.END,
+                f"{row['class_code']}  {row['course_name']}  {row['teacher'] or ''}  [{row['course_type']}]"
+            )
+        if not self.search_results:
+            self.search_listbox.insert(tk.END, "本地目录中没有匹配的课程")
+    
+    def use_search_result(self):
+        """把选中的搜索结果填入课程代码输入框，已有内容时作为备选追加在后面"""
+        selection = self.search_listbox.curselection()
+        if not selection or selection[0] >= len(self.search_results):
+            return
+        
+        row = self.search_results[selection[0]]
+        text = self.code_entry.get().strip()
+        if row['class_code'] in self.parse_codes(text):
+            return
+        self.code_entry.delete(0, tk.END)
+        self.code_entry.insert(0, f"{text}, {row['class_code']}" if text else row['class_code'])
+        self.type_var.set(TYPE_NAMES[row['course_type']])
+    
+    def start_catalog_sync(self, force=False):
+        """在后台线程中同步课程目录"""
+        threading.Thread(target=self.sync_catalog, args=(force,), daemon=True).start()
+    
+    def sync_catalog(self, force=False):
+        """同步课程目录，请求同样经过选课引擎的调度器"""
+        def fetch_page(course_type, page_number, page_size):
+            client = self.engine.course_client
+            return self.engine.submit(
+                ("catalog", course_type),
+                client.query_courses,
+                client.student_code, client.batch_code, course_type, "", page_size, page_number
+            ).result()
+        
+        try:
+            changed = self.catalog.sync(
+                self.engine.course_client.batch_code,
+                fetch_page,
+                self.engine.course_client.CLASS_TYPES,
+                force=force
+            )
+            if changed:
+                summary = "，".join(f"{course_type} {count}门有更新" for course_type, count in changed.items())
+                self.engine.log(f"课程目录同步完成：{summary}")
+        except Exception as e:
+            self.engine.log(f"课程目录同步失败：{str(e)}")
+    
+    def show_metrics(self):
+        """打开请求指标窗口，按接口展示延迟分布，每秒刷新，可导出快照"""
+        if getattr(self, 'metrics_window', None) is not None and self.metrics_window.winfo_exists():
+            self.metrics_window.lift()
+            return
+        
+        self.metrics_window = ttk.Toplevel(self.window)
+        self.metrics_window.title("请求指标")
+        self.metrics_window.geometry("760x320")
+        
+        columns = ("endpoint", "count", "errors", "connects", "mean", "p50", "p95", "ttfb_p50")
+        headings = ("接口", "请求数", "失败数", "新建连接", "平均ms", "p50ms", "p95ms", "首字节p50ms")
+        tree = ttk.Treeview(self.metrics_window, columns=columns, show="headings", height=10)
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=220 if column == "endpoint" else 70, anchor=tk.W if column == "endpoint" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        button_frame = ttk.Frame(self.metrics_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(
+            button_frame,
+            text="导出Prometheus",
+            style="primary.TButton",
+            command=lambda: self.export_metrics(".prom")
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            button_frame,
+            text="导出JSON",
+            style="primary.TButton",
+            command=lambda: self.export_metrics(".json")
+        ).pack(side=tk.LEFT, padx=5)
+        ttk.Button(
+            button_frame,
+            text="清空",
+            style="secondary.TButton",
+            command=METRICS.reset
+        ).pack(side=tk.LEFT, padx=5)
+        
+        def refresh():
+            if not tree.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for row in METRICS.summary():
+                tree.insert("", tk.END, values=(
+                    row['endpoint'], row['count'], row['errors'], row['connects'],
+                    f"{row['mean'] * 1000:.1f}", f"{row['p50'] * 1000:.0f}",
+                    f"{row['p95'] * 1000:.0f}", f"{row['ttfb_p50'] * 1000:.0f}"
+                ))
+            self.metrics_window.after(1000, refresh)
+        
+        refresh()
+    
+    def export_metrics(self, extension):
+        """导出请求指标快照"""
+        path = filedialog.asksaveasfilename(
+            parent=self.metrics_window,
+            defaultextension=extension,
+            filetypes=[("Prometheus", "*.prom")] if extension == ".prom" else [("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            METRICS.export(path)
+            self.engine.log(f"请求指标已导出到 {path}")
+        except OSError as e:
+            messagebox.showerror("错误", f"导出失败：{str(e)}")
+    
+    def create_target_frame(self):
+        """创建抢课列表，每行是一组互为替代的教学班，数量不限"""
+        frame = ttk.LabelFrame(self.main_frame, text="抢课列表", padding="10")
+        
+        input_frame = ttk.Frame(frame)
+        input_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(
+            input_frame,
+            text="课程代码：",
+            font=("Microsoft YaHei UI", 10)
+        ).pack(side=tk.LEFT, padx=5)
+        
+        self.code_entry = ttk.Entry(input_frame, width=28)
+        self.code_entry.pack(side=tk.LEFT, padx=5)
+        self.code_entry.bind("<Return>", lambda event: self.add_target_from_input())
+        
+        self.type_var = tk.StringVar(value=TYPE_NAMES["major"])
+        ttk.Combobox(
+            input_frame,
+            textvariable=self.type_var,
+            values=list(TYPE_NAMES.values()),
+            state="readonly",
+            width=10
+        ).pack(side=tk.LEFT, padx=5)
+        
+        option_frame = ttk.Frame(frame)
+        option_frame.pack(fill=tk.X, pady=5)
+        
+        self.watch_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            option_frame,
+            text="有空位时才提交",
+            variable=self.watch_var
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            option_frame,
+            text="添加",
+            style="primary.TButton",
+            command=self.add_target_from_input
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(
+            frame,
+            text="同一行填写多个教学班（用逗号分隔）时按先后顺序作为备选，选上任意一个即停止其余",
+            font=("Microsoft YaHei UI", 9)
+        ).pack(anchor=tk.W, padx=5)
+        
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        columns = ("codes", "type", "watch", "status")
+        self.target_table = ttk.Treeview(table_frame, columns=columns, show="headings", height=8)
+        for column, heading, width in (
+            ("codes", "教学班（按优先级）", 220),
+            ("type", "类型", 80),
+            ("watch", "等待空位", 60),
+            ("status", "状态", 120)
+        ):
+            self.target_table.heading(column, text=heading)
+            self.target_table.column(column, width=width, anchor=tk.W)
+        self.target_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        scrollbar = ttk.Scrollbar(table_frame, command=self.target_table.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.target_table.config(yscrollcommand=scrollbar.set)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=5)
+        
+        for text, style, command in (
+            ("开始抢课", "primary.TButton", lambda: self.start_targets(self.target_table.selection())),
+            ("停止抢课", "danger.TButton", lambda: self.stop_targets(self.target_table.selection())),
+            ("全部开始", "primary.TButton", lambda: self.start_targets(self.target_table.get_children())),
+            ("全部停止", "danger.TButton", lambda: self.stop_targets(self.target_table.get_children())),
+            ("删除", "secondary.TButton", self.remove_targets)
+        ):
+            ttk.Button(button_frame, text=text, style=style, command=command).pack(side=tk.LEFT, padx=5)
+        
+        return frame
+    
+    @staticmethod
+    def parse_codes(text):
+        """把输入的课程代码拆分为列表，支持逗号、顿号和空格分隔"""
+        codes = [code.strip() for code in re.split(r"[,，、\s]+", text) if code.strip()]
+        return list(dict.fromkeys(codes))
+    
+    def add_target_from_input(self):
+        """把输入框中的课程添加到抢课列表"""
+        codes = self.parse_codes(self.code_entry.get())
+        if not codes:
+            messagebox.showerror("错误", "请输入课程代码")
+            return
+        
+        course_type = next(key for key, name in TYPE_NAMES.items() if name == self.type_var.get())
+        self.add_target(codes, course_type, self.watch_var.get())
+        self.code_entry.delete(0, tk.END)
+    
+    def add_target(self, codes, course_type, watch, replaces=""):
+        """添加一行抢课目标，返回该行的iid；replaces 不为空时为换课，显示为“退掉的教学班 → 要选的教学班”"""
+        iid = str(self.next_target_id)
+        self.next_target_id += 1
+        self.targets[iid] = {'codes': codes, 'type': course_type, 'watch': watch or bool(replaces), 'replaces': replaces}
+        label = " / ".join(codes)
+        if replaces:
+            label = f"{replaces} → {label}"
+        self.target_table.insert("", tk.END, iid=iid, values=(
+            label, TYPE_NAMES[course_type], "是" if watch or replaces else "否", "未开始"
+        ))
+        return iid
+    
+    def set_target_status(self, iid, status):
+        if self.target_table.exists(iid):
+            self.target_table.set(iid, "status", status)
+    
+    def start_targets(self, iids):
+        """开始抢选中的课程，整组只占用一个抢课任务"""
+        iids = [iid for iid in iids if iid in self.targets and iid not in self.running]
+        if not iids:
+            return
+        
+        batch_code = self.engine.course_client.batch_code
+        if self.catalog.latest_batch() == batch_code:
+            missing = [
+                code for iid in iids for code in self.targets[iid]['codes']
+                if not self.catalog.resolve(batch_code, code)
+            ]
+            if missing and not messagebox.askokcancel(
+                "提示", f"本地课程目录中未找到 {'、'.join(missing)}，仍要开始抢课吗？"
+            ):
+                return
+        
+        for iid in iids:
+            target = self.targets[iid]
+            group = TargetGroup(
+                [(code, target['type']) for code in target['codes']], target['watch'], target['replaces']
+            )
+            run = (iid, self.next_run_id)
+            self.next_run_id += 1
+            self.engine.watch_group(run, group)
+            self.running[iid] = run
+            self.set_target_status(iid, "等待空位" if target['watch'] else "抢课中")
+    
+    def stop_targets(self, iids):
+        """停止抢选中的课程"""
+        for iid in iids:
+            run = self.running.pop(iid, None)
+            if run is not None:
+                self.engine.cancel(run)
+                self.set_target_status(iid, "已停止")
+    
+    def remove_targets(self):
+        """从抢课列表中删除选中的课程"""
+        iids = self.target_table.selection()
+        self.stop_targets(iids)
+        for iid in iids:
+            self.targets.pop(iid, None)
+            self.target_table.delete(iid)
+    
+    def apply_config(self, old, new):
+        """
+        应用修改后的配置文件：速率设置交给选课引擎，课程列表按差异增删；
+        正在抢课时新增的课程立即开始，否则只加入列表
+        """
+        self.config = new
+        self.engine.apply_config(new)
+        
+        added, removed = diff_courses(old, new)
+        for course in removed:
+            iid = self.config_targets.pop(course, None)
+            if iid in self.targets:
+                self.stop_targets([iid])
+                self.targets.pop(iid)
+                self.target_table.delete(iid)
+        
+        iids = []
+        for course in added:
+            iid = self.add_target(list(course.codes), course.course_type, course.watch, course.replaces)
+            self.config_targets[course] = iid
+            iids.append(iid)
+        if self.running:
+            self.start_targets(iids)
+        
+        self.engine.log(f"配置文件已更新：新增 {len(added)} 组课程，移除 {len(removed)} 组课程")
+    
+    def process_engine_events(self):
+        """在界面线程中处理选课引擎的事件，在线人数只显示本轮收到的最新值"""
+        online_users = None
+        while True:
+            try:
+                kind, data = self.engine.events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "result":
+                run, course_code, outcome = data
+                if self.running.get(run[0]) == run:
+                    self.set_target_status(run[0], f"{course_code} {OUTCOME_NAMES.get(outcome, outcome)}")
+            elif kind == "selected":
+                self.selected_targets.add(data)
+            elif kind == "finished":
+                iid = data[0]
+                if self.running.get(iid) == data:
+                    del self.running[iid]
+                    if data not in self.selected_targets:
+                        self.set_target_status(iid, "已结束")
+                self.selected_targets.discard(data)
+            elif kind == "online_users":
+                online_users = data
+        
+        if online_users is not None:
+            self.window.title(f"选课系统 - {self.user_name} - 当前在线人数：{online_users}")
+        
+        while not self.config_updates.empty():
+            self.apply_config(*self.config_updates.get())
+        
+        self.window.after(100, self.process_engine_events)
+
+
+    def on_closing(self):
+        """处理窗口关闭事件"""
+        if messagebox.askokcancel("退出", "确定要退出程序吗？"):
+            self.config_watcher.stop()
+            self.profiler.stop()
+            self.sessions.stop()
+            self.engine.stop()
+            self.log_sink.close()
+            JOURNAL.close()
+            self.root.destroy()  # 完全退出程序
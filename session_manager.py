@@ -0,0 +1,164 @@
+import threading
+import time
+from typing import Callable, Optional, Tuple
+from cache import BootstrapCache
+from course_selection import CourseSelection
+from journal import JOURNAL
+from login import Login
+from session_store import SessionStore
+
+
+class _Flight:
+    """一次正在进行的登录，其他调用方等待同一个结果"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Tuple[Optional[CourseSelection], str] = (None, "")
+
+
+class SessionManager:
+    """
+    登录会话管理
+    - 持有当前的选课客户端，重新登录成功后原子地替换，正在运行的任务下一次请求即使用新会话
+    - 多个调用方同时要求重新登录时只执行一次登录，其余调用方等待并共享同一个结果
+    - 后台定时检查会话，在到达刷新间隔或检查失败时主动重新登录，尽量不等到选课请求提示登录失效
+
+    每次替换客户端后 generation 加一，调用方可据此判断自己用的是否已是旧会话
+    """
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        course_client: CourseSelection,
+        store: Optional[SessionStore] = None,
+        refresh_interval: float = 25 * 60,
+        check_interval: float = 60,
+        log: Callable[[str], None] = print,
+        logged_in_at: Optional[float] = None
+    ):
+        """
+        Args:
+            username: 学号
+            password: 密码
+            course_client: 登录后创建的选课客户端
+            store: 登录状态存储，刷新成功后写入新的登录状态
+            refresh_interval: 距上次登录超过该时间（秒）即主动重新登录
+            check_interval: 后台检查会话的间隔（秒）
+            log: 输出提示信息的函数
+            logged_in_at: course_client 实际登录的时间戳（Login.logged_in_at），为空时视为刚刚登录；
+                恢复的登录状态可能已经保存了很久，刷新间隔从当初登录时算起
+        """
+        self.username = username
+        self.password = password
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        self.log = log
+
+        self.generation = 0
+        self.logged_in_at = time.monotonic()
+        if logged_in_at is not None:
+            self.logged_in_at -= max(0.0, time.time() - logged_in_at)
+        self._client = course_client
+        self._lock = threading.Lock()
+        self._flight: Optional[_Flight] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def client(self) -> CourseSelection:
+        return self._client
+
+    def current(self) -> Tuple[CourseSelection, int]:
+        """同时返回当前的选课客户端和对应的 generation"""
+        with self._lock:
+            return self._client, self.generation
+
+    def start(self) -> None:
+        """启动后台刷新线程"""
+        self._thread = threading.Thread(target=self._refresh_loop, name="session-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def refresh(self, generation: Optional[int] = None) -> Tuple[Optional[CourseSelection], str]:
+        """
+        重新登录并替换当前会话，同一时间只会有一个登录过程
+
+        Args:
+            generation: 调用方发现失效的会话版本，若当前会话已经比它新则直接返回当前客户端
+
+        Returns:
+            (新的选课客户端或None, 提示信息)
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return self._client, "已使用新的登录状态"
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        started_at = time.monotonic()
+        try:
+            result = self._login()
+        except Exception as e:
+            result = (None, f"重新登录错误：{str(e)}")
+        JOURNAL.record(
+            "login", r="refresh", o="ok" if result[0] is not None else "failed",
+            l=time.monotonic() - started_at, m=result[1]
+        )
+
+        with self._lock:
+            if result[0] is not None:
+                self._client = result[0]
+                self.generation += 1
+                self.logged_in_at = time.monotonic()
+            self._flight = None
+
+        flight.result = result
+        flight.done.set()
+        return result
+
+    def _login(self) -> Tuple[Optional[CourseSelection], str]:
+        # 新会话共用连接池但使用独立的Cookie，登录过程中旧会话的请求不受影响
+        old_client = self._client
+        client = Login(old_client.session.fork())
+        success, message = client.login_process(self.username, self.password)
+        if not success:
+            return None, f"重新登录失败：{message}"
+
+        if self.store is not None:
+            client.save_session(self.store, self.username, self.password)
+
+        course_client = CourseSelection(
+            session=client.session,
+            token=client.token,
+            ticket=client.ticket,
+            student_code=self.username,
+            cache=old_client.cache or BootstrapCache()
+        )
+        # 已选课程和上课时间与登录无关，沿用旧会话查到的结果
+        course_client.selected_courses = old_client.selected_courses
+        course_client.teaching_places = old_client.teaching_places
+        return course_client, "重新登录成功"
+
+    def _refresh_loop(self) -> None:
+        while not self._stopped.wait(self.check_interval):
+            client, generation = self.current()
+            if time.monotonic() - self.logged_in_at >= self.refresh_interval:
+                reason = "登录状态即将过期"
+            elif not client.is_session_valid():
+                reason = "登录状态已失效"
+            else:
+                continue
+
+            new_client, message = self.refresh(generation)
+            if new_client is not None and new_client is not client:
+                self.log(f"{reason}，已在后台刷新")
+            elif new_client is None:
+                self.log(f"{reason}，后台刷新失败：{message}")
@@ -0,0 +1,78 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+from Crypto.Cipher import AES
+from Crypto.Random import get_random_bytes
+
+DEFAULT_PATH = "session.dat"
+
+
+class SessionStore:
+    """
+    登录状态的本地存储
+    保存登录得到的cookies、token、ticket和姓名，下次启动时先尝试恢复，避免完整的登录流程
+
+    文件内容使用由密码派生的密钥进行AES-GCM加密，并限制为仅当前用户可读写；
+    密码不正确或文件被篡改时无法解密，视为没有保存的登录状态
+    """
+    def __init__(self, path: str = DEFAULT_PATH, max_age: float = 12 * 3600):
+        """
+        Args:
+            path: 存储文件路径
+            max_age: 登录状态的最长保存时间（秒），超过后不再尝试恢复
+        """
+        self.path = path
+        self.max_age = max_age
+
+    def save(self, username: str, password: str, state: dict) -> None:
+        """
+        加密保存登录状态
+
+        Args:
+            username: 学号
+            password: 密码，用于派生加密密钥
+            state: 登录状态，包含cookies、token、ticket、name
+        """
+        payload = dict(state, username=username, saved_at=time.time())
+        salt = get_random_bytes(16)
+        cipher = AES.new(_derive_key(password, salt), AES.MODE_GCM)
+        data, tag = cipher.encrypt_and_digest(json.dumps(payload).encode("utf-8"))
+
+        content = {
+            key: base64.b64encode(value).decode("ascii")
+            for key, value in (("salt", salt), ("nonce", cipher.nonce), ("tag", tag), ("data", data))
+        }
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(content, f)
+        except OSError as e:
+            print(f"保存登录状态失败：{str(e)}")
+
+    def load(self, username: str, password: str) -> Optional[dict]:
+        """读取并解密登录状态，不存在、已过期或无法解密时返回None"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                content = {key: base64.b64decode(value) for key, value in json.load(f).items()}
+            cipher = AES.new(_derive_key(password, content["salt"]), AES.MODE_GCM, nonce=content["nonce"])
+            payload = json.loads(cipher.decrypt_and_verify(content["data"], content["tag"]))
+        except (OSError, KeyError, ValueError):
+            return None
+
+        if payload.get("username") != username or time.time() - payload.get("saved_at", 0) > self.max_age:
+            return None
+        return payload
+
+    def clear(self) -> None:
+        """删除保存的登录状态"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _derive_key(password: str, salt: bytes) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100000)
@@ -0,0 +1,42 @@
+import pytest
+from course_selection import (
+    ALREADY_SELECTED, CLASSIFICATION, CLOSED, CONFLICT, DROP_CLASSIFICATION, FULL, INVALID, LIMIT_EXCEEDED,
+    NOT_HELD, NOT_OPEN, RATE_LIMITED, SELECTED, SESSION_EXPIRED, UNKNOWN, classify
+)
+
+# (接口返回的 code, msg, 期望的分类)；很多失败消息都含有"已选"，这里固定关键字的匹配顺序
+SELECT_CASES = [
+    ("1", "选课成功", SELECTED),
+    ("0", "该课程已选，不能重复选择", ALREADY_SELECTED),
+    ("0", "已在选课结果中", ALREADY_SELECTED),
+    ("0", "与已选课程时间冲突", CONFLICT),
+    ("0", "已选学分超出上限", LIMIT_EXCEEDED),
+    ("0", "已选课程门数超过限制", LIMIT_EXCEEDED),
+    ("0", "已选人数已达到课容量", FULL),
+    ("0", "该教学班已满", FULL),
+    ("0", "当前不在选课时间范围内", NOT_OPEN),
+    ("0", "本轮选课已结束", CLOSED),
+    ("0", "请求过于频繁，请稍后再试", RATE_LIMITED),
+    ("0", "登录失效，请重新登录", SESSION_EXPIRED),
+    ("0", "教学班不存在", INVALID),
+    ("0", "系统繁忙", UNKNOWN),
+]
+
+DROP_CASES = [
+    ("0", "已选课程中不存在该教学班", NOT_HELD),
+    ("0", "该课程不允许退课", INVALID),
+    ("0", "选课已结束", CLOSED),
+    ("0", "登录失效，请重新登录", SESSION_EXPIRED),
+]
+
+
+@pytest.mark.parametrize("code, msg, outcome", SELECT_CASES)
+def test_classify(code, msg, outcome):
+    result = classify({"code": code, "msg": msg}, CLASSIFICATION)
+    assert result.outcome == outcome
+    assert result.success == (outcome in (SELECTED, ALREADY_SELECTED))
+
+
+@pytest.mark.parametrize("code, msg, outcome", DROP_CASES)
+def test_classify_drop(code, msg, outcome):
+    assert classify({"code": code, "msg": msg}, DROP_CLASSIFICATION).outcome == outcome
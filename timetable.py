@@ -0,0 +1,128 @@
+import re
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Set, Tuple
+
+# 没有写明上课周次时视为每周都上课；按位与的结果即为另一方的周次
+ALL_WEEKS = -1
+
+WEEKDAYS = {"一": 1, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "日": 7, "天": 7}
+
+# teachingPlace 中的一段上课安排，如"1-16周 星期一 第3-4节 主楼A-101"、"1-15周(单) 星期三 第1-2节"，
+# 一个教学班可能有多段，分隔符不固定，因此直接在整个字符串中逐段匹配
+SCHEDULE_PATTERN = re.compile(
+    r"(?:(?<![A-Za-z0-9-])(?P<weeks>\d+(?:\s*[-~,，]\s*\d+)*)\s*周\s*[(（]?(?P<parity>[单双])?[)）]?[\s,，]*)?"
+    r"星期(?P<weekday>[一二三四五六日天1-7])[\s,，]*"
+    r"第?(?P<start>\d+)(?:\s*[-~]\s*(?P<end>\d+))?节"
+)
+
+
+class Slot(NamedTuple):
+    """一段上课时间：星期 weekday 的第 start 到第 end 节，weeks 的第n位表示第n周是否上课"""
+    weekday: int
+    start: int
+    end: int
+    weeks: int = ALL_WEEKS
+
+    def overlaps(self, other: "Slot") -> bool:
+        return (self.weekday == other.weekday and self.start <= other.end and other.start <= self.end
+                and bool(self.weeks & other.weeks))
+
+
+def _parse_weeks(text: str, parity: str) -> int:
+    weeks = 0
+    for part in re.split(r"\s*[,，]\s*", text):
+        bounds = re.split(r"\s*[-~]\s*", part)
+        first, last = int(bounds[0]), int(bounds[-1])
+        for week in range(first, last + 1):
+            if not parity or (week % 2 == 1) == (parity == "单"):
+                weeks |= 1 << week
+    return weeks
+
+
+def parse_schedule(text: str) -> Tuple[Slot, ...]:
+    """
+    解析教学班的 teachingPlace，得到各段上课时间；无法识别的部分忽略
+
+    Args:
+        text: 如"1-16周 星期一 第3-4节 主楼A-101;9-16周 星期三 第5-6节 主楼A-102"
+    """
+    slots = []
+    for match in SCHEDULE_PATTERN.finditer(text or ""):
+        weekday = match.group("weekday")
+        start = int(match.group("start"))
+        end = int(match.group("end") or start)
+        weeks = _parse_weeks(match.group("weeks"), match.group("parity")) if match.group("weeks") else ALL_WEEKS
+        slots.append(Slot(WEEKDAYS.get(weekday) or int(weekday), min(start, end), max(start, end), weeks))
+    return tuple(slots)
+
+
+class Timetable:
+    """
+    已选课程的课表
+    按 (星期, 节次) 建立索引，每个格子记录占用它的教学班及其上课周次，
+    检查一个教学班是否冲突只需查看它占用的几个格子，与已选课程的数量无关
+    """
+    def __init__(self):
+        # 教学班代码 -> 上课时间
+        self._slots: Dict[str, Tuple[Slot, ...]] = {}
+        # (星期, 节次) -> {教学班代码: 上课周次}
+        self._index: Dict[Tuple[int, int], Dict[str, int]] = {}
+
+    def __contains__(self, owner: str) -> bool:
+        return owner in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(self, owner: str, slots: Iterable[Slot]) -> None:
+        """加入一个已选的教学班，已存在时先移除原有的上课时间"""
+        self.remove(owner)
+        slots = tuple(slots)
+        self._slots[owner] = slots
+        for slot in slots:
+            for period in range(slot.start, slot.end + 1):
+                cell = self._index.setdefault((slot.weekday, period), {})
+                cell[owner] = cell.get(owner, 0) | slot.weeks
+
+    def remove(self, owner: str) -> Tuple[Slot, ...]:
+        """移除一个教学班，返回它原来的上课时间"""
+        slots = self._slots.pop(owner, ())
+        for slot in slots:
+            for period in range(slot.start, slot.end + 1):
+                cell = self._index.get((slot.weekday, period))
+                if cell is not None:
+                    cell.pop(owner, None)
+                    if not cell:
+                        del self._index[(slot.weekday, period)]
+        return slots
+
+    def update(self, courses: Mapping[str, Iterable[Slot]]) -> List[Slot]:
+        """
+        用最新的已选课程替换课表，只增删有变化的教学班
+
+        Args:
+            courses: 教学班代码 -> 上课时间
+
+        Returns:
+            新增和移除的教学班的上课时间，可据此只重新检查受影响的目标
+        """
+        changed: List[Slot] = []
+        for owner in [owner for owner in self._slots if owner not in courses]:
+            changed.extend(self.remove(owner))
+        for owner, slots in courses.items():
+            slots = tuple(slots)
+            if self._slots.get(owner) != slots:
+                changed.extend(self.remove(owner))
+                self.add(owner, slots)
+                changed.extend(slots)
+        return changed
+
+    def conflicts(self, slots: Iterable[Slot], ignore: Iterable[str] = ()) -> List[str]:
+        """与 slots 时间冲突的已选教学班，ignore 中的教学班不计入"""
+        ignored: Set[str] = set(ignore)
+        found: Dict[str, None] = {}
+        for slot in slots:
+            for period in range(slot.start, slot.end + 1):
+                for owner, weeks in self._index.get((slot.weekday, period), {}).items():
+                    if weeks & slot.weeks and owner not in ignored:
+                        found[owner] = None
+        return list(found)